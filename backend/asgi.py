@@ -0,0 +1,103 @@
+import asyncio
+import logging
+
+import socketio
+from dotenv import load_dotenv
+
+from database.db import SQLiteDB
+from core.async_reasoning import AsyncReasoningEngine
+from core.reasoning import resync_message, stop_engines
+from core.emitter import AsyncQueueEmitter
+from core.session import Session, InputMessage, MsgStatus
+from core.message_queue import get_async_client_manager
+from core import blobs
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+load_dotenv()
+
+# asyncio Socket.IO server, one worker multiplexes many conversations:
+#   uvicorn asgi:app --host 0.0.0.0 --port 8000
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    cors_allowed_origins="*",
+    client_manager=get_async_client_manager(),
+)
+
+db = SQLiteDB()
+
+
+class AsyncChatNamespace(socketio.AsyncNamespace):
+    """Socket.IO chat namespace at /chat (asyncio server)."""
+
+    def __init__(self, namespace="/chat"):
+        super().__init__(namespace)
+
+    async def on_connect(self, sid, environ):
+        logger.info(f"[/chat] client connected: {sid}")
+
+    async def on_disconnect(self, sid, *args):
+        logger.info(f"[/chat] client disconnected: {sid}")
+
+    async def on_chat(self, sid, message: dict):
+        logger.info(f"[/chat] on_chat: {message}")
+        emitter = AsyncQueueEmitter(sio, sid, namespace=self.namespace)
+
+        try:
+            try:
+                # Loading the session touches SQLite, keep it off the loop
+                sess = await asyncio.to_thread(Session, db=db, emitter=emitter, **message)
+                await asyncio.to_thread(sess.create)
+
+                inp = InputMessage(db=db, emitter=emitter, **message)
+                await asyncio.to_thread(inp.publish)
+            except Exception as e:
+                logger.exception("Failed to initialize session/input message")
+                emitter("chat", {"error": f"Init error: {e}"})
+                return
+
+            try:
+                system_prompt = message.get("system_prompt", "You are a helpful assistant.")
+                engine = AsyncReasoningEngine(
+                    system_prompt=system_prompt,
+                    input_message=inp,
+                    session=sess,
+                )
+
+                await engine.arun()
+            except Exception as e:
+                logger.exception("Error running AsyncReasoningEngine")
+                try:
+                    await sess.output_message.aupdate_status(MsgStatus.error)
+                except Exception:
+                    pass
+                emitter("chat", {"error": str(e)})
+        finally:
+            await emitter.aclose()
+
+    async def on_stop(self, sid, message: dict):
+        """Stop generating for a session, cancelling its running engines."""
+        session_id = message.get("session_id", "")
+        stopped = stop_engines(session_id, msg_id=message.get("msg_id"))
+        logger.info(f"[/chat] stop {session_id}: {stopped} running")
+
+    async def on_resync(self, sid, message: dict):
+        """Send a full snapshot of a message the client lost track of (missed ``chat_patch``)."""
+        emitter = AsyncQueueEmitter(sio, sid, namespace=self.namespace)
+        try:
+            await asyncio.to_thread(
+                resync_message, db, message.get("session_id", ""), message.get("msg_id", ""), emitter
+            )
+        finally:
+            await emitter.aclose()
+
+    async def on_fetch_blob(self, sid, message: dict):
+        """Acknowledge with the full tool output behind a ``blob_ref``."""
+        blob_ref = message.get("blob_ref", "")
+        return {"blob_ref": blob_ref, "data": await asyncio.to_thread(blobs.load, db, blob_ref)}
+
+
+sio.register_namespace(AsyncChatNamespace("/chat"))
+
+app = socketio.ASGIApp(sio)
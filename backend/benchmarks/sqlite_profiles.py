@@ -0,0 +1,90 @@
+"""Write throughput of the SQLite durability profiles.
+
+Replays the write pattern of ``OutputMessage.publish()`` (the same message
+re-written with a growing content list) against a fresh database per profile,
+while a reader thread keeps loading the conversation history.
+
+Usage (from the backend directory)::
+
+    python -m benchmarks.sqlite_profiles --messages 200 --updates 10
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from database.db import SQLiteDB
+from database.profiles import PROFILES
+
+
+def run_profile(profile: str, messages: int, updates: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SQLiteDB(db_path=os.path.join(tmp, f"{profile}.db"), profile=profile)
+        db.create_session("bench")
+
+        stop = threading.Event()
+        read_latencies = []
+
+        def reader():
+            while not stop.is_set():
+                start = time.perf_counter()
+                db.get_conversations("bench")
+                read_latencies.append(time.perf_counter() - start)
+                time.sleep(0.001)
+
+        reader_thread = threading.Thread(target=reader, daemon=True)
+        reader_thread.start()
+
+        writes = 0
+        start = time.perf_counter()
+        for m in range(messages):
+            content = []
+            for u in range(updates):
+                content.append({"type": "text", "text": f"chunk {u} " * 20})
+                db.add_or_update_msg_to_conv(
+                    session_id="bench",
+                    conv_id="bench",
+                    msg_id=f"msg-{m}",
+                    msg_type="output",
+                    tools=[],
+                    actions=[],
+                    content=content,
+                    status="progress",
+                )
+                writes += 1
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        reader_thread.join()
+
+    read_latencies.sort()
+    p99 = read_latencies[int(len(read_latencies) * 0.99) - 1] if read_latencies else 0.0
+    return {
+        "profile": profile,
+        "writes": writes,
+        "writes_per_sec": writes / elapsed,
+        "reads": len(read_latencies),
+        "read_p99_ms": p99 * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=10, help="publishes per message")
+    parser.add_argument("--profiles", nargs="*", default=list(PROFILES))
+    args = parser.parse_args()
+
+    print(f"{'profile':<10} {'writes':>8} {'writes/s':>10} {'reads':>8} {'read p99 ms':>12}")
+    for profile in args.profiles:
+        r = run_profile(profile, args.messages, args.updates)
+        print(
+            f"{r['profile']:<10} {r['writes']:>8} {r['writes_per_sec']:>10.0f} "
+            f"{r['reads']:>8} {r['read_p99_ms']:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
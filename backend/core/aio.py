@@ -0,0 +1,46 @@
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_loop: asyncio.AbstractEventLoop = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide background event loop, starting it on first use.
+
+    Long-lived async resources (e.g. MCP sessions) live on this loop so sync
+    code does not have to spin up a new loop and thread for every call.
+    """
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="blaze-aio", daemon=True
+            )
+            thread.start()
+            _loop = loop
+            logger.info("Started background event loop")
+    return _loop
+
+
+def run_coroutine(coro, timeout: float = None):
+    """Run ``coro`` on the background loop and block until it finishes."""
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+async def arun_coroutine(coro, timeout: float = None):
+    """Await ``coro`` on the background loop from any event loop, without blocking it."""
+    loop = get_loop()
+    if asyncio.get_running_loop() is loop:
+        return await asyncio.wait_for(coro, timeout)
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
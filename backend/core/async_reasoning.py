@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+from typing import List
+
+from tools.base import ToolResponse
+from core.enums import ToolStatus
+from core.session import ContextMessage, RoleTypes, MsgStatus, ToolContent, ToolProgress
+from core.llm import LLMResponse
+from core.mcp_manager import get_mcp_manager
+from core.reasoning import ReasoningEngine
+from core.router import get_async_llm
+from tools.mcp_tool import MCPTool
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncReasoningEngine(ReasoningEngine):
+    """``ReasoningEngine`` for the asyncio Socket.IO server (see ``asgi.py``).
+
+    LLM calls use ``AsyncOpenAI`` (or the ``AsyncLLMRouter``, see
+    ``get_async_llm``) and MCP tools are awaited, so a single event
+    loop serves many conversations concurrently. Sync-only tools run in worker
+    threads via ``BaseTool.arun``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.allm = get_async_llm()
+        self._task: asyncio.Task = None
+
+    def cancel(self):
+        """Stop the generation, cancelling the awaited LLM stream or tool calls."""
+        super().cancel()
+        task = self._task
+        if task is not None and not task.done():
+            task.get_loop().call_soon_threadsafe(task.cancel)
+
+    def _init_mcp_sync(self):
+        """MCP tools are loaded by ``ainit_mcp`` instead, without blocking the loop."""
+        pass
+
+    async def ainit_mcp(self):
+        """Load MCP tools from the process-wide MCP manager's cached catalog."""
+        if not self.mcp_config:
+            logger.info("Skipping MCP initialization due to empty config")
+            return
+
+        try:
+            self.mcp = get_mcp_manager(self.mcp_config)
+            self.tools.extend(
+                MCPTool(self.session, self.mcp, spec) for spec in await self.mcp.aget_tools()
+            )
+        except Exception as e:
+            logger.error(f"Failed to initialize MCP client: {e}")
+
+    async def _achat_completions(self, tools: list = []) -> LLMResponse:
+        """Async variant of ``_chat_completions``."""
+        self._stream_index = None
+        messages = self.session.reasoning_context
+        if self.context_manager.total_tokens(messages) > self.context_manager.budget_tokens:
+            # Trimming may call the LLM for a summary, keep it off the loop
+            messages = await asyncio.to_thread(self.context_manager.fit, messages)
+        return await self.allm.chat_completions(
+            messages=[m.to_llm_msg() for m in messages],
+            tools=tools,
+            stream=self.stream,
+            on_delta=self._on_delta,
+            cancel=self.cancel_event,
+        )
+
+    async def _aappend_and_publish_text(self, text: str, status: MsgStatus):
+        self._append_text(text, status)
+        await self.output_message.apublish()
+
+    async def arun_tools(self, tool_calls: List[dict]) -> List[ToolResponse]:
+        """Async variant of ``run_tools``."""
+        tool_contents = []
+        for tc in tool_calls:
+            tool_content = ToolContent(
+                tool_name=tc["tool"]["name"],
+                tool_args=tc["tool"]["arguments"],
+                tool_response=None,
+                tool_status=ToolStatus.PROGRESS,
+            )
+            self.output_message.content.append(tool_content)
+            tool_contents.append(tool_content)
+        await self.output_message.apublish()
+
+        async def on_done(index: int, response: ToolResponse):
+            # Offloading writes the blob store, keep it off the loop
+            await asyncio.to_thread(self._offload_tool_response, response)
+            self._record_tool_response(tool_contents[index], response)
+            await self.output_message.apublish()
+
+        async def on_progress(index: int, progress: ToolProgress):
+            tool_contents[index].tool_progress = progress
+            await self.output_message.apublish()
+
+        calls = [
+            (
+                self.tools.get(tc["tool"]["name"]),
+                tc["tool"]["name"],
+                tc["tool"]["arguments"],
+            )
+            for tc in tool_calls
+        ]
+        return await self.executor.arun(
+            calls, on_done=on_done, on_progress=on_progress, validate=self.tools.validate
+        )
+
+    async def astep(self):
+        """Async variant of ``step``."""
+        if self.stop_flag:
+            return
+
+        final_round = self._budget_exhausted()
+        llm_response: LLMResponse = await self._achat_completions(
+            tools=[] if final_round else self.tools.llm_format(),
+        )
+        self.used_tokens += llm_response.total_tokens
+        logger.info(f"LLM Response: {llm_response}")
+
+        if self.cancel_event.is_set():
+            return
+
+        if not llm_response.status:
+            await self._aappend_and_publish_text(llm_response.content, MsgStatus.error)
+            self.stop()
+            return
+
+        if not llm_response.tool_calls:
+            await self._aappend_and_publish_text(llm_response.content, MsgStatus.success)
+            self.stop()
+            return
+
+        self._stream_index = None
+        self.session.reasoning_context.append(
+            ContextMessage(content=llm_response.content, tool_calls=llm_response.tool_calls, role=RoleTypes.assistant)
+        )
+
+        tool_responses = await self.arun_tools(llm_response.tool_calls)
+        for tc, tr in zip(llm_response.tool_calls, tool_responses):
+            self.session.reasoning_context.append(
+                ContextMessage(content=str(tr), tool_call_id=tc["id"], role=RoleTypes.tool)
+            )
+
+    async def arun(self, max_iterations: int | None = None):
+        """Async variant of ``run``."""
+        self.iterations = max_iterations or self.max_iterations
+        self.deadline = time.monotonic() + self.max_duration
+        await self.ainit_mcp()
+        self.build_context()
+        self.output_message.actions.append("Reasoning the message..")
+        await self.output_message.apublish()
+
+        self._task = asyncio.current_task()
+        self._register()
+        try:
+            while self.iterations > 0 and not self.stop_flag:
+                self.iterations -= 1
+                await self.astep()
+        except asyncio.CancelledError:
+            if not self.cancel_event.is_set():
+                raise
+            # Cancelled by the user, finish up normally
+            self._task.uncancel()
+        finally:
+            self._unregister()
+
+        if self.cancel_event.is_set():
+            self._settle_cancelled()
+            await self.output_message.apublish()
+        elif not self.stop_flag:
+            # Budget ran out without a final answer
+            await self.output_message.aupdate_status(MsgStatus.error)
+
+        await asyncio.to_thread(self.session.save_context_messages)
+        logger.info("Reasoning Engine Finished")
@@ -18,6 +18,7 @@ class LLMResponse(BaseModel):
     send_tokens: int = 0
     recv_tokens: int = 0
     total_tokens: int = 0
+    cached_tokens: int = 0
     finish_reason: str = ""
     status: int = LLMResponseStatus.ERROR
 
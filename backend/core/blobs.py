@@ -0,0 +1,61 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Optional, Tuple
+
+from database.db import SQLiteDB
+
+logger = logging.getLogger(__name__)
+
+
+def inline_limit() -> int:
+    """Characters of (JSON) tool output kept inline, larger outputs go to the blob store. 0 disables it."""
+    return int(os.getenv("TOOL_RESULT_INLINE_LIMIT", "8192"))
+
+
+def preview_chars() -> int:
+    return int(os.getenv("TOOL_RESULT_PREVIEW_CHARS", "1000"))
+
+
+def _serialise(data: Any) -> str:
+    return data if isinstance(data, str) else json.dumps(data, default=str)
+
+
+def offload(db: SQLiteDB, data: Any) -> Tuple[Any, Optional[str]]:
+    """Move ``data`` to the blob store when it is over the inline limit.
+
+    :return: ``(data, None)`` for small data, else ``(preview, blob_ref)`` where
+        the preview is the start of the serialised data plus a truncation note.
+    """
+    limit = inline_limit()
+    if not limit or data is None:
+        return data, None
+
+    text = _serialise(data)
+    if len(text) <= limit:
+        return data, None
+
+    # Stored as JSON so ``load`` gives back the original value
+    raw = json.dumps(data, default=str).encode()
+    blob_ref = hashlib.sha256(raw).hexdigest()
+    db.put_blob(blob_ref, raw)
+    preview = f"{text[:preview_chars()]}... [truncated, {len(text)} characters in total]"
+    logger.info(f"Offloaded {len(text)} characters of tool output to blob {blob_ref[:12]}")
+    return preview, blob_ref
+
+
+def load(db: SQLiteDB, blob_ref: str) -> Optional[Any]:
+    """Load an offloaded value, ``None`` if the blob does not exist."""
+    raw = db.get_blob(blob_ref)
+    return json.loads(raw) if raw is not None else None
+
+
+def read_text(db: SQLiteDB, blob_ref: str, offset: int = 0, length: int = None) -> Optional[str]:
+    """Serialised text of an offloaded value from ``offset``, at most ``length`` characters."""
+    raw = db.get_blob(blob_ref)
+    if raw is None:
+        return None
+    text = _serialise(json.loads(raw))
+    end = None if length is None else offset + length
+    return text[offset:end]
@@ -0,0 +1,124 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+from database.db import SQLiteDB
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(namespace: str, payload: Any) -> str:
+    """Hash of the normalised (key-sorted JSON) ``payload`` within ``namespace``."""
+    normalised = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{namespace}:{normalised}".encode()).hexdigest()
+
+
+class BaseCache(ABC):
+    """Interface for response caches. Values must be JSON serialisable."""
+
+    def __init__(self, default_ttl: float = None):
+        """
+        :param float default_ttl: Seconds an entry lives when ``set`` gets no ttl.
+        """
+        self.default_ttl = default_ttl or float(os.getenv("CACHE_TTL", "3600"))
+
+    def _expires_at(self, ttl: Optional[float]) -> float:
+        return time.time() + (ttl or self.default_ttl)
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, ``None`` on a miss or expired entry."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float = None):
+        """Cache ``value`` for ``ttl`` seconds."""
+        pass
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Async variant of ``get``. Defaults to running ``get`` in a worker thread,
+        caches that never block should override it."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl: float = None):
+        """Async variant of ``set``, see ``aget``."""
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+
+class LRUCache(BaseCache):
+    """In-memory, per-process LRU cache."""
+
+    def __init__(self, max_entries: int = None, default_ttl: float = None):
+        super().__init__(default_ttl)
+        self.max_entries = max_entries or int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        with self._lock:
+            self._items[key] = (self._expires_at(ttl), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        # In memory, a thread hop would cost more than the lookup
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, ttl: float = None):
+        self.set(key, value, ttl)
+
+
+class SQLiteCache(BaseCache):
+    """Persistent cache in the ``response_cache`` table, shared by all workers."""
+
+    def __init__(self, db: SQLiteDB = None, default_ttl: float = None):
+        super().__init__(default_ttl)
+        self.db = db or SQLiteDB()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.db.get_cache_entry(key)
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        self.db.set_cache_entry(key, value, self._expires_at(ttl))
+
+
+_cache: Optional[BaseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[BaseCache]:
+    """Return the process-wide cache selected by ``CACHE_BACKEND`` (memory | sqlite | none)."""
+    global _cache
+    backend = os.getenv("CACHE_BACKEND", "memory").lower()
+    if backend == "none":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            if backend == "sqlite":
+                _cache = SQLiteCache()
+            elif backend == "memory":
+                _cache = LRUCache()
+            else:
+                raise ValueError(f"Unknown CACHE_BACKEND {backend!r}, expected memory, sqlite or none")
+            logger.info(f"Using {type(_cache).__name__} response cache")
+    return _cache
@@ -0,0 +1,265 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from core.ratelimit import Priority
+from core.session import ContextMessage, RoleTypes
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _encoding = None
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = (
+    "Summarise the conversation below for your own future reference. Keep user "
+    "goals, decisions, facts and tool results that may matter later. Be concise."
+)
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when available, else estimate ~4 chars per token."""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: ContextMessage) -> int:
+    """Token count of a context message, cached on the message."""
+    if message._token_count is None:
+        text = json.dumps(message.to_llm_msg(), default=str)
+        message._token_count = count_tokens(text) + MESSAGE_OVERHEAD_TOKENS
+    return message._token_count
+
+
+def _split_turns(messages: List[ContextMessage]):
+    """Split into leading system messages and turns, a turn starts at a user message."""
+    head = []
+    index = 0
+    while index < len(messages) and messages[index].role == RoleTypes.system:
+        head.append(messages[index])
+        index += 1
+
+    turns = []
+    for message in messages[index:]:
+        if message.role == RoleTypes.user or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return head, turns
+
+
+def _flatten(turns: List[List[ContextMessage]]) -> List[ContextMessage]:
+    return [message for turn in turns for message in turn]
+
+
+class _SummaryCache:
+    """Process-wide LRU of summaries keyed by a hash chain over the summarised turns."""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._items: OrderedDict = OrderedDict()
+        # Keys whose summarisation failed, until when they are not retried
+        self._failed: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        return None
+
+    def set(self, key: str, summary: str):
+        with self._lock:
+            self._items[key] = summary
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def set_failed(self, key: str, ttl: float):
+        with self._lock:
+            self._failed[key] = time.monotonic() + ttl
+            self._failed.move_to_end(key)
+            while len(self._failed) > self.max_size:
+                self._failed.popitem(last=False)
+
+    def failed(self, key: str) -> bool:
+        """Whether summarising ``key`` failed less than its TTL ago."""
+        with self._lock:
+            until = self._failed.get(key)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._failed[key]
+                return False
+            return True
+
+
+_summary_cache = _SummaryCache()
+
+
+class ContextWindowManager:
+    """Fits the reasoning context into a token budget before every LLM call.
+
+    Strategies, applied in order until the context fits:
+
+    1. Elide tool outputs older than the last ``keep_last_turns`` turns.
+    2. Replace those older turns with a rolling summary (cached).
+    3. Drop the oldest remaining turns, always keeping the latest one.
+    4. Elide the remaining tool outputs except the latest ones.
+
+    The session's ``reasoning_context`` is never modified, a new list is returned.
+    """
+
+    def __init__(
+        self,
+        llm=None,
+        budget_tokens: int = None,
+        keep_last_turns: int = None,
+        tool_output_chars: int = None,
+        summarize: bool = None,
+    ):
+        """
+        :param llm: LLM used to write summaries, summaries are skipped without one.
+        :param int budget_tokens: Maximum tokens of the messages sent to the LLM.
+        :param int keep_last_turns: Turns kept verbatim whenever possible.
+        :param int tool_output_chars: Characters kept of an elided tool output.
+        :param bool summarize: Summarise old turns instead of only dropping them.
+        """
+        self.llm = llm
+        self.budget_tokens = budget_tokens or int(os.getenv("CONTEXT_BUDGET_TOKENS", "60000"))
+        self.keep_last_turns = keep_last_turns or int(os.getenv("CONTEXT_KEEP_LAST_TURNS", "4"))
+        self.tool_output_chars = tool_output_chars or int(os.getenv("CONTEXT_TOOL_OUTPUT_CHARS", "500"))
+        if summarize is None:
+            summarize = os.getenv("CONTEXT_SUMMARIZE", "true").lower() == "true"
+        self.summarize = summarize
+        # Seconds a failed summary is not retried, the old turns are dropped meanwhile
+        self.summary_retry_seconds = float(os.getenv("CONTEXT_SUMMARY_RETRY_SECONDS", "60"))
+
+    def total_tokens(self, messages: List[ContextMessage]) -> int:
+        return sum(message_tokens(m) for m in messages)
+
+    def fit(self, messages: List[ContextMessage]) -> List[ContextMessage]:
+        """Return ``messages`` trimmed to the token budget."""
+        if self.total_tokens(messages) <= self.budget_tokens:
+            return messages
+
+        head, turns = _split_turns(messages)
+        recent = turns[-self.keep_last_turns:]
+        old = turns[:-self.keep_last_turns] if len(turns) > self.keep_last_turns else []
+
+        # 1. Elide old tool outputs
+        old = [[self._elide(m) for m in turn] for turn in old]
+        fitted = head + _flatten(old) + _flatten(recent)
+        if self.total_tokens(fitted) <= self.budget_tokens:
+            return fitted
+
+        # 2. Summarise old turns
+        if old and self.summarize and self.llm is not None:
+            summary = self._summary(old)
+            if summary:
+                head = head + [
+                    ContextMessage(
+                        content=f"Summary of the earlier conversation:\n{summary}",
+                        role=RoleTypes.system,
+                    )
+                ]
+                old = []
+                fitted = head + _flatten(recent)
+                if self.total_tokens(fitted) <= self.budget_tokens:
+                    return fitted
+
+        # 3. Drop the oldest turns
+        turns = old + recent
+        while len(turns) > 1 and self.total_tokens(head + _flatten(turns)) > self.budget_tokens:
+            turns.pop(0)
+
+        # 4. Elide tool outputs of the latest turn except its last round
+        last = turns[-1] if turns else []
+        last_call = max(
+            (i for i, m in enumerate(last) if m.role == RoleTypes.assistant and m.tool_calls),
+            default=len(last),
+        )
+        fitted = head + _flatten(turns[:-1]) + [
+            self._elide(m) if i < last_call else m for i, m in enumerate(last)
+        ]
+        if self.total_tokens(fitted) > self.budget_tokens:
+            logger.warning(
+                f"Context still over budget after trimming "
+                f"({self.total_tokens(fitted)} > {self.budget_tokens} tokens)"
+            )
+        return fitted
+
+    def _elide(self, message: ContextMessage) -> ContextMessage:
+        if message.role != RoleTypes.tool or not isinstance(message.content, str):
+            return message
+        if len(message.content) <= self.tool_output_chars:
+            return message
+        elided = len(message.content) - self.tool_output_chars
+        copy = message.model_copy(
+            update={
+                "content": f"{message.content[:self.tool_output_chars]}... [{elided} characters elided]"
+            }
+        )
+        copy._token_count = None
+        return copy
+
+    def _summary(self, turns: List[List[ContextMessage]]) -> Optional[str]:
+        """Rolling summary of ``turns``, extending the longest already summarised prefix."""
+        keys = []
+        digest = ""
+        for turn in turns:
+            payload = json.dumps([m.to_llm_msg() for m in turn], default=str, sort_keys=True)
+            digest = hashlib.sha256((digest + payload).encode()).hexdigest()
+            keys.append(digest)
+
+        cached = _summary_cache.get(keys[-1])
+        if cached is not None:
+            return cached
+        if _summary_cache.failed(keys[-1]):
+            return None
+
+        previous, start = None, 0
+        for k in range(len(keys) - 2, -1, -1):
+            previous = _summary_cache.get(keys[k])
+            if previous is not None:
+                start = k + 1
+                break
+
+        transcript = []
+        if previous:
+            transcript.append(f"Earlier summary:\n{previous}")
+        for message in _flatten(turns[start:]):
+            content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+            if message.role == RoleTypes.tool:
+                content = content[:self.tool_output_chars]
+            if message.tool_calls:
+                calls = ", ".join(tc["tool"]["name"] for tc in message.tool_calls)
+                content = f"{content or ''} [called: {calls}]"
+            transcript.append(f"{message.role}: {content}")
+
+        response = self.llm.chat_completions(
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": "\n\n".join(transcript)},
+            ],
+            priority=Priority.BACKGROUND,
+        )
+        if not response.status or not response.content:
+            logger.warning(f"Context summarisation failed: {response.content}")
+            _summary_cache.set_failed(keys[-1], self.summary_retry_seconds)
+            return None
+
+        _summary_cache.set(keys[-1], response.content)
+        return response.content
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SocketIOEmitter:
+    """Emitter sending to one client through ``flask_socketio.SocketIO``.
+
+    Unlike ``flask_socketio.emit`` it needs no request context, so it works
+    from background jobs (and across workers with a message queue).
+    """
+
+    def __init__(self, socketio, sid: str, namespace: str = "/chat"):
+        """
+        :param socketio: The ``flask_socketio.SocketIO`` instance.
+        :param str sid: Socket.IO session id of the client to send to.
+        :param str namespace: Namespace to emit on.
+        """
+        self.socketio = socketio
+        self.sid = sid
+        self.namespace = namespace
+
+    def __call__(self, event: str, data: dict):
+        self.socketio.emit(event, data, to=self.sid, namespace=self.namespace)
+
+
+class AsyncQueueEmitter:
+    """Emitter for ``socketio.AsyncServer`` usable from sync code.
+
+    ``OutputMessage.publish`` is synchronous, so events are queued and a drain
+    task awaits ``sio.emit`` for them in order. Safe to call from the owning
+    event loop or from worker threads (e.g. tools run via ``asyncio.to_thread``).
+    """
+
+    def __init__(self, sio, sid: str, namespace: str = "/chat"):
+        """
+        :param sio: The ``socketio.AsyncServer``.
+        :param str sid: Socket.IO session id of the client to send to.
+        :param str namespace: Namespace to emit on.
+        """
+        self.sio = sio
+        self.sid = sid
+        self.namespace = namespace
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = self._loop.create_task(self._drain())
+
+    def __call__(self, event: str, data: dict):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._queue.put_nowait((event, data))
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, (event, data))
+
+    async def _drain(self):
+        while True:
+            item = await self._queue.get()
+            try:
+                if item is None:
+                    return
+                event, data = item
+                await self.sio.emit(event, data, to=self.sid, namespace=self.namespace)
+            except Exception as e:
+                logger.error(f"Failed to emit to {self.sid}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def aclose(self):
+        """Send the queued events, then stop the drain task."""
+        self._queue.put_nowait(None)
+        await self._task
@@ -0,0 +1,225 @@
+import asyncio
+import inspect
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.enums import ToolStatus
+from core.session import ToolProgress
+from tools.base import BaseTool, ProgressSlot, ToolResponse, progress_slot
+
+logger = logging.getLogger(__name__)
+
+# How often a wait for tool calls checks for cancellation
+CANCEL_POLL_SECONDS = 0.1
+
+
+async def _maybe_await(result):
+    if inspect.isawaitable(result):
+        await result
+
+
+class ToolExecutor:
+    """Runs the tool calls of one LLM turn concurrently.
+
+    Calls run on a bounded pool, each with its own timeout. ``on_done`` is
+    invoked from the calling thread as soon as a call finishes, so it is safe
+    to publish socket events from it. Progress reported by running calls
+    (``tools.base.report_progress``) reaches ``on_progress`` the same way, at
+    most once per ``progress_interval``.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = None,
+        default_timeout: float = None,
+        progress_interval: float = None,
+    ):
+        """
+        :param int max_concurrency: Maximum tool calls running at once.
+        :param float default_timeout: Timeout in seconds for tools without their own ``timeout``.
+        :param float progress_interval: Seconds between progress updates of running calls.
+        """
+        self.max_concurrency = max_concurrency or int(os.getenv("TOOL_CONCURRENCY", "4"))
+        self.default_timeout = default_timeout or float(os.getenv("TOOL_TIMEOUT", "60"))
+        self.progress_interval = progress_interval or float(os.getenv("TOOL_PROGRESS_INTERVAL", "0.5"))
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="blaze-tool"
+            )
+        return self._pool
+
+    def run(
+        self,
+        calls: List[Tuple[Optional[BaseTool], str, dict]],
+        on_done: Callable[[int, ToolResponse], None] = None,
+        cancel: threading.Event = None,
+        on_progress: Callable[[int, ToolProgress], None] = None,
+        validate: Callable[[str, dict], Optional[str]] = None,
+    ) -> List[ToolResponse]:
+        """Run ``(tool, tool_name, arguments)`` calls and return responses in call order.
+
+        A ``None`` tool means the tool was not found. A call ``validate`` returns
+        an error for fails with it without running. Once ``cancel`` is set the
+        calls still pending finish with an error and queued ones never start.
+        """
+        responses: List[Optional[ToolResponse]] = [None] * len(calls)
+        futures: Dict[Future, int] = {}
+        started: Dict[int, float] = {}
+        slots = [ProgressSlot() for _ in calls]
+        lock = threading.Lock()
+
+        def finish(index: int, response: ToolResponse):
+            responses[index] = response
+            if on_done:
+                on_done(index, response)
+
+        def invoke(index: int, tool: BaseTool, arguments: dict) -> ToolResponse:
+            with lock:
+                started[index] = time.monotonic()
+            token = progress_slot.set(slots[index])
+            try:
+                return tool.safe_call(**arguments)
+            finally:
+                progress_slot.reset(token)
+
+        for index, (tool, tool_name, arguments) in enumerate(calls):
+            if tool is None:
+                error = f"Tool {tool_name} not found"
+                finish(index, ToolResponse(status=ToolStatus.ERROR, message=error, data={"error": error}))
+                continue
+            error = validate(tool_name, arguments) if validate else None
+            if error:
+                finish(index, ToolResponse(status=ToolStatus.ERROR, message=error, data={"error": error}))
+                continue
+            futures[self._get_pool().submit(invoke, index, tool, arguments)] = index
+
+        def timeout_of(index: int) -> float:
+            return calls[index][0].timeout or self.default_timeout
+
+        pending = set(futures)
+        next_progress_at = time.monotonic() + self.progress_interval
+        while pending:
+            with lock:
+                deadlines = [
+                    started[futures[f]] + timeout_of(futures[f])
+                    for f in pending
+                    if futures[f] in started
+                ]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            if cancel is not None:
+                wait_for = CANCEL_POLL_SECONDS if wait_for is None else min(wait_for, CANCEL_POLL_SECONDS)
+            if on_progress is not None:
+                until_progress = max(0.0, next_progress_at - time.monotonic())
+                wait_for = until_progress if wait_for is None else min(wait_for, until_progress)
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = futures[future]
+                try:
+                    response = future.result()
+                except Exception as e:
+                    logger.exception(f"Tool call {calls[index][1]} failed: {e}")
+                    response = ToolResponse(status=ToolStatus.ERROR, message=str(e), data={"error": str(e)})
+                finish(index, response)
+
+            if cancel is not None and cancel.is_set():
+                for future in pending:
+                    future.cancel()
+                    error = f"Tool {calls[futures[future]][1]} was cancelled"
+                    finish(futures[future], ToolResponse(status=ToolStatus.ERROR, message=error, data={"error": error}))
+                break
+
+            now = time.monotonic()
+            for future in list(pending):
+                index = futures[future]
+                with lock:
+                    start = started.get(index)
+                if start is None or now < start + timeout_of(index):
+                    continue
+                # The worker thread cannot be interrupted, its result is discarded
+                future.cancel()
+                pending.discard(future)
+                error = f"Tool {calls[index][1]} timed out after {timeout_of(index)}s"
+                logger.warning(error)
+                finish(index, ToolResponse(status=ToolStatus.ERROR, message=error, data={"error": error}))
+
+            if on_progress is not None and now >= next_progress_at:
+                next_progress_at = now + self.progress_interval
+                for future in pending:
+                    progress = slots[futures[future]].take()
+                    if progress is not None:
+                        on_progress(futures[future], progress)
+
+        return responses
+
+    async def arun(
+        self,
+        calls: List[Tuple[Optional[BaseTool], str, dict]],
+        on_done: Callable[[int, ToolResponse], None] = None,
+        on_progress: Callable[[int, ToolProgress], None] = None,
+        validate: Callable[[str, dict], Optional[str]] = None,
+    ) -> List[ToolResponse]:
+        """Async variant of ``run`` for the async engine.
+
+        Calls are tasks on the running loop bounded by a semaphore, ``on_done``
+        and ``on_progress`` are invoked on the loop and may be coroutine functions.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        responses: List[Optional[ToolResponse]] = [None] * len(calls)
+        slots = [ProgressSlot() for _ in calls]
+
+        async def invoke(index: int, tool: Optional[BaseTool], tool_name: str, arguments: dict):
+            # Every call is its own task, so the slot stays local to it
+            progress_slot.set(slots[index])
+            error = None
+            if tool is None:
+                error = f"Tool {tool_name} not found"
+            elif validate:
+                error = validate(tool_name, arguments)
+            if error:
+                response = ToolResponse(status=ToolStatus.ERROR, message=error, data={"error": error})
+            else:
+                async with semaphore:
+                    timeout = tool.timeout or self.default_timeout
+                    try:
+                        response = await asyncio.wait_for(tool.asafe_call(**arguments), timeout)
+                    except asyncio.TimeoutError:
+                        error = f"Tool {tool_name} timed out after {timeout}s"
+                        logger.warning(error)
+                        response = ToolResponse(status=ToolStatus.ERROR, message=error, data={"error": error})
+                    except Exception as e:
+                        logger.exception(f"Tool call {tool_name} failed: {e}")
+                        response = ToolResponse(status=ToolStatus.ERROR, message=str(e), data={"error": str(e)})
+            responses[index] = response
+            if on_done:
+                await _maybe_await(on_done(index, response))
+
+        async def publish_progress():
+            while True:
+                await asyncio.sleep(self.progress_interval)
+                for index, slot in enumerate(slots):
+                    progress = slot.take()
+                    if progress is not None and responses[index] is None:
+                        await _maybe_await(on_progress(index, progress))
+
+        progress_task = asyncio.create_task(publish_progress()) if on_progress else None
+        try:
+            await asyncio.gather(
+                *(asyncio.create_task(invoke(index, *call)) for index, call in enumerate(calls))
+            )
+        finally:
+            if progress_task is not None:
+                progress_task.cancel()
+        return responses
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,77 @@
+import random
+import re
+import threading
+from typing import Callable, Dict, List
+
+from core.base import BaseLLM, BaseLLMConfig
+from core.llm import CANCELLED, LLMDelta, LLMResponse, LLMResponseStatus
+
+
+class FakeLLMConfig(BaseLLMConfig):
+    """Config of the offline ``FakeLLM``.
+
+    :param float latency: Seconds every completion takes.
+    :param float error_rate: Share of completions (0-1) that fail.
+    :param str reply: Fixed reply, by default the last user message is echoed.
+    """
+
+    llm_type: str = "fake"
+    chat_model: str = "fake"
+    latency: float = 0.0
+    error_rate: float = 0.0
+    reply: str = ""
+
+
+class FakeLLM(BaseLLM):
+    """Offline LLM for tests and local runs, never calls a provider or tools."""
+
+    def __init__(self, config: FakeLLMConfig = None):
+        """
+        :param config: Fake LLM config.
+        """
+        if config is None:
+            config = FakeLLMConfig()
+        super().__init__(config)
+        self.latency = config.latency
+        self.error_rate = config.error_rate
+        self.reply = config.reply
+
+    def _reply_to(self, messages: List[Dict]) -> str:
+        if self.reply:
+            return self.reply
+        for message in reversed(messages):
+            if message.get("role") == "user":
+                content = message.get("content")
+                return content if isinstance(content, str) else str(content)
+        return ""
+
+    def chat_completions(
+        self,
+        messages: List[Dict],
+        tools: List[Dict] = [],
+        stream: bool = False,
+        on_delta: Callable[[LLMDelta], None] = None,
+        cancel: threading.Event = None,
+        **kwargs,
+    ) -> LLMResponse:
+        if cancel is None:
+            cancel = threading.Event()
+        if self.latency and cancel.wait(self.latency):
+            return LLMResponse(finish_reason=CANCELLED, status=LLMResponseStatus.SUCCESS)
+        if random.random() < self.error_rate:
+            return LLMResponse(content="Error: fake LLM failure")
+
+        content = self._reply_to(messages)
+        if stream and on_delta:
+            for word in re.findall(r"\s*\S+", content):
+                if cancel.is_set():
+                    return LLMResponse(finish_reason=CANCELLED, status=LLMResponseStatus.SUCCESS)
+                on_delta(LLMDelta(content=word))
+        tokens = len(content) // 4 + 1
+        return LLMResponse(
+            content=content,
+            finish_reason="stop",
+            recv_tokens=tokens,
+            total_tokens=tokens,
+            status=LLMResponseStatus.SUCCESS,
+        )
@@ -0,0 +1,163 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised by ``JobDispatcher.submit`` when the queue is at capacity."""
+
+
+class _Job:
+    __slots__ = ("key", "fn", "args", "kwargs", "enqueued_at")
+
+    def __init__(self, key: str, fn: Callable, args: tuple, kwargs: dict):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued_at = time.monotonic()
+
+
+class JobDispatcher:
+    """Bounded job queue drained by a fixed pool of worker threads.
+
+    Jobs with the same key (the session id) run one at a time in submission
+    order, jobs of different keys run concurrently up to ``max_workers``.
+    Under eventlet the workers are green threads.
+    """
+
+    def __init__(self, max_workers: int = None, max_queue: int = None):
+        """
+        :param int max_workers: Jobs running at once, the global concurrency cap.
+        :param int max_queue: Jobs waiting before ``submit`` raises ``JobQueueFull``.
+        """
+        self.max_workers = max_workers or int(os.getenv("JOB_WORKERS", "8"))
+        self.max_queue = max_queue or int(os.getenv("JOB_QUEUE_SIZE", "100"))
+        self._cond = threading.Condition()
+        # Pending jobs per key, and the keys that have pending jobs and are not running
+        self._pending: Dict[str, Deque[_Job]] = {}
+        self._ready: Deque[str] = deque()
+        self._running: Set[str] = set()
+        self._depth = 0
+        self._workers = []
+        self._closed = False
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "cancelled": 0}
+        self._wait_seconds = 0.0
+
+    def _start_workers(self):
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._work, name=f"blaze-job-{len(self._workers)}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, key: str, fn: Callable, *args, **kwargs):
+        """Queue ``fn(*args, **kwargs)`` behind the other jobs of ``key``."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("JobDispatcher is closed")
+            if self._depth >= self.max_queue:
+                self._stats["rejected"] += 1
+                raise JobQueueFull(f"Job queue is full ({self.max_queue} waiting)")
+
+            jobs = self._pending.setdefault(key, deque())
+            jobs.append(_Job(key, fn, args, kwargs))
+            self._depth += 1
+            self._stats["submitted"] += 1
+            if len(jobs) == 1 and key not in self._running:
+                self._ready.append(key)
+                self._cond.notify()
+            self._start_workers()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._closed:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                key = self._ready.popleft()
+                job = self._pending[key].popleft()
+                self._depth -= 1
+                self._running.add(key)
+                self._wait_seconds += time.monotonic() - job.enqueued_at
+
+            failed = False
+            try:
+                job.fn(*job.args, **job.kwargs)
+            except Exception as e:
+                failed = True
+                logger.exception(f"Job for {key} failed: {e}")
+
+            with self._cond:
+                self._running.discard(key)
+                self._stats["failed" if failed else "completed"] += 1
+                if self._pending[key]:
+                    self._ready.append(key)
+                    self._cond.notify()
+                else:
+                    del self._pending[key]
+
+    def cancel(self, key: str, on_drop: Callable = None) -> int:
+        """Drop the queued (not yet running) jobs of ``key``, returns how many were dropped.
+
+        :param on_drop: Called with the arguments of every dropped job (after the
+            job's ``fn`` arguments), e.g. to tell the client its message was dropped.
+        """
+        with self._cond:
+            jobs = self._pending.get(key)
+            if not jobs:
+                return 0
+            dropped = list(jobs)
+            jobs.clear()
+            self._depth -= len(dropped)
+            self._stats["cancelled"] += len(dropped)
+            if key not in self._running:
+                self._ready.remove(key)
+                del self._pending[key]
+
+        if on_drop is not None:
+            for job in dropped:
+                try:
+                    on_drop(*job.args, **job.kwargs)
+                except Exception as e:
+                    logger.exception(f"on_drop failed for a cancelled job of {key}: {e}")
+        return len(dropped)
+
+    def metrics(self) -> dict:
+        """Queue depth, running jobs and counters since start."""
+        with self._cond:
+            started = self._stats["completed"] + self._stats["failed"] + len(self._running)
+            return {
+                "queue_depth": self._depth,
+                "running": len(self._running),
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                **self._stats,
+                "avg_wait_seconds": round(self._wait_seconds / started, 3) if started else 0.0,
+            }
+
+    def close(self):
+        """Stop the workers once the queued jobs have run."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+_dispatcher: Optional[JobDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> JobDispatcher:
+    """Return the process-wide ``JobDispatcher``."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = JobDispatcher()
+    return _dispatcher
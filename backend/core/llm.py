@@ -1,18 +1,33 @@
 from typing import Dict
+import hashlib
 import json
+from collections import OrderedDict
 from enum import Enum
+import asyncio
+import logging
 import os
-from typing import List
+import threading
+import time
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Tuple
 
 from openai.types.chat import ChatCompletion
+from core.base import BaseLLM
+from core.cache import get_cache, make_cache_key
+from core.ratelimit import Priority, backoff_delay, get_rate_limiter, is_retryable
 from pydantic import BaseModel, Field, field_validator, FieldValidationInfo
 from pydantic_settings import SettingsConfigDict
 
+logger = logging.getLogger(__name__)
+
 class LLMResponseStatus:
     SUCCESS: bool = True
     ERROR: bool = False
 
 
+# ``finish_reason`` of a completion aborted through ``cancel``
+CANCELLED = "cancelled"
+
+
 class LLMResponse(BaseModel):
     """Response model for completions from LLMs."""
 
@@ -21,8 +36,25 @@ class LLMResponse(BaseModel):
     send_tokens: int = 0
     recv_tokens: int = 0
     total_tokens: int = 0
+    # Prompt tokens served from the provider's prompt cache
+    cached_tokens: int = 0
     finish_reason: str = ""
     status: int = LLMResponseStatus.ERROR
+    # Served from the response cache
+    cached: bool = False
+
+
+class LLMDelta(BaseModel):
+    """Incremental chunk of a streamed completion.
+
+    ``tool_calls`` holds raw fragments as they arrive, e.g.
+    ``{"index": 0, "id": "call_x", "name": "add", "arguments": '{"a": '}``.
+    The last delta of a stream carries the aggregated ``response``.
+    """
+
+    content: str = ""
+    tool_calls: List[Dict] = []
+    response: Optional[LLMResponse] = None
 
 
 class OpenAIChatModel(str, Enum):
@@ -45,6 +77,7 @@ class OpenaiConfig(BaseModel):
     )
 
     llm_type: str = "openai"
+    enable_langfuse: bool = False
     api_key: str = os.getenv("OPENAI_API_KEY")
     api_base: str = os.getenv("OPENAI_API_BASE")
     chat_model: str = Field(default=OpenAIChatModel.GPT4o)
@@ -52,6 +85,24 @@ class OpenaiConfig(BaseModel):
     temperature: float = 0.9
     top_p: float = 1
     timeout: int = 120
+    # HTTP connection pool shared by every request made through the client
+    max_connections: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+    max_keepalive_connections: int = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    keepalive_expiry: float = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+    # Canonical tool order / serialisation and a stable prompt_cache_key so the
+    # system + tools prefix is byte-identical across turns and sessions
+    canonical_prompt: bool = os.getenv("OPENAI_CANONICAL_PROMPT", "true").lower() == "true"
+    # Cache every completion, by default only deterministic (temperature 0) calls are cached
+    cache_responses: bool = os.getenv("OPENAI_CACHE_RESPONSES", "false").lower() == "true"
+    cache_ttl: float = float(os.getenv("OPENAI_CACHE_TTL", "3600"))
+    # Client-side limits shared by every client using the same API key, 0 disables a limit
+    rpm: int = int(os.getenv("OPENAI_RPM", "0"))
+    tpm: int = int(os.getenv("OPENAI_TPM", "0"))
+    max_concurrency: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "0"))
+    # Retries of rate limited (429) and transient errors, with jittered backoff
+    max_retries: int = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+    backoff_base: float = float(os.getenv("OPENAI_BACKOFF_BASE", "0.5"))
+    backoff_max: float = float(os.getenv("OPENAI_BACKOFF_MAX", "30"))
     
 
     @field_validator("api_key")
@@ -64,28 +115,74 @@ class OpenaiConfig(BaseModel):
         return v
 
 
-class OpenAIClient:
+def _canonical(value, key: str = None):
+    """Recursively sort dict keys (and ``required`` lists) for a stable serialisation."""
+    if isinstance(value, dict):
+        return {k: _canonical(value[k], k) for k in sorted(value)}
+    if isinstance(value, list):
+        items = [_canonical(v) for v in value]
+        if key == "required" and all(isinstance(v, str) for v in items):
+            items = sorted(items)
+        return items
+    return value
+
+
+def _cached_tokens(usage) -> int:
+    details = getattr(usage, "prompt_tokens_details", None) if usage else None
+    return getattr(details, "cached_tokens", None) or 0
+
+
+class OpenAIClient(BaseLLM):
     def __init__(self, config: OpenaiConfig = None):
         """
         :param config: OpenAI Config
         """
         if config is None:
             config = OpenaiConfig()
-        # Initialize config attributes
-        self.api_key = config.api_key
-        self.api_base = config.api_base
-        self.chat_model = config.chat_model
-        self.max_tokens = config.max_tokens
-        self.temperature = config.temperature
-        self.top_p = config.top_p
-        self.timeout = config.timeout
+        super().__init__(config)
+        self.canonical_prompt = config.canonical_prompt
+        self.cache_responses = config.cache_responses
+        self.cache_ttl = config.cache_ttl
+        self.cache = get_cache()
+        self.max_retries = config.max_retries
+        self.backoff_base = config.backoff_base
+        self.backoff_max = config.backoff_max
+        self.limiter = get_rate_limiter(
+            make_cache_key("openai", [self.api_base, self.api_key]),
+            rpm=config.rpm,
+            tpm=config.tpm,
+            max_concurrency=config.max_concurrency,
+        )
+        # Formatted tool payloads by hash of the raw tool list
+        self._tools_cache: OrderedDict = OrderedDict()
+        # Formatted payload by identity of a tool tuple built once (tools.registry.ToolRegistry)
+        self._tools_by_id: OrderedDict = OrderedDict()
+        self._tools_size_by_id: OrderedDict = OrderedDict()
+        self._tools_cache_lock = threading.Lock()
+        self.client = self._build_client(config)
+
+    def _build_client(self, config: OpenaiConfig):
         try:
+            import httpx
             import openai
         except ImportError:
             raise ImportError("Please install OpenAI python library.")
 
-        self.client = openai.OpenAI(api_key=self.api_key, base_url=self.api_base)
-
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            timeout=self.timeout,
+        )
+        # Retries go through the rate limiter, see _create
+        return openai.OpenAI(
+            api_key=self.api_key,
+            base_url=self.api_base,
+            http_client=self.http_client,
+            max_retries=0,
+        )
 
     def _format_messages(self, messages: list):
         """Format the messages to the format that OpenAI expects."""
@@ -102,7 +199,8 @@ class OpenAIClient:
                                 "function": {
                                     "name": tool_call["tool"]["name"],
                                     "arguments": json.dumps(
-                                        tool_call["tool"]["arguments"]
+                                        tool_call["tool"]["arguments"],
+                                        sort_keys=self.canonical_prompt,
                                     ),
                                 },
                                 "type": tool_call["type"],
@@ -140,7 +238,52 @@ class OpenAIClient:
                     }
                 }
             ]
+
+        In canonical mode tools are sorted by name and their schemas are
+        key-sorted, and the result is cached so every turn sends the same bytes.
+        """
+        return self._format_tools_with_digest(tools)[0]
+
+    def _format_tools_with_digest(self, tools) -> Tuple[list, str]:
+        """``_format_tools`` plus a digest of the tools, used in the cache keys.
+
+        An immutable tuple of tools (``ToolRegistry.llm_format``) is formatted
+        and hashed once, then served by identity without re-serialising it.
         """
+        if isinstance(tools, tuple):
+            with self._tools_cache_lock:
+                entry = self._tools_by_id.get(id(tools))
+                if entry is not None and entry[0] is tools:
+                    self._tools_by_id.move_to_end(id(tools))
+                    return entry[1], entry[2]
+            formatted_tools, digest = self._format_tools_with_digest(list(tools))
+            with self._tools_cache_lock:
+                # The entry keeps ``tools`` alive, so its id is not reused while cached
+                self._tools_by_id[id(tools)] = (tools, formatted_tools, digest)
+                while len(self._tools_by_id) > 32:
+                    self._tools_by_id.popitem(last=False)
+            return formatted_tools, digest
+
+        digest = hashlib.sha256(json.dumps(tools, sort_keys=True, default=str).encode()).hexdigest()
+        if not self.canonical_prompt:
+            return self._build_tools(tools), digest
+
+        with self._tools_cache_lock:
+            formatted_tools = self._tools_cache.get(digest)
+            if formatted_tools is not None:
+                self._tools_cache.move_to_end(digest)
+                return formatted_tools, digest
+
+        formatted_tools = self._build_tools(
+            sorted((_canonical(tool) for tool in tools), key=lambda t: t["name"])
+        )
+        with self._tools_cache_lock:
+            self._tools_cache[digest] = formatted_tools
+            while len(self._tools_cache) > 32:
+                self._tools_cache.popitem(last=False)
+        return formatted_tools, digest
+
+    def _build_tools(self, tools: list):
         formatted_tools = []
         for tool in tools:
             formatted_tools.append(
@@ -156,13 +299,9 @@ class OpenAIClient:
             )
         return formatted_tools
 
-    def chat_completions(
-        self, messages: list, tools: list = [], stop=None, response_format=None
-    ):
-        """Get completions for chat.
-
-        docs: https://platform.openai.com/docs/guides/function-calling
-        """
+    def _build_params(
+        self, messages: list, tools: list, stop, response_format, prompt_cache_key: bool = True
+    ) -> dict:
         params = {
             "model": self.chat_model,
             "messages": self._format_messages(messages),
@@ -172,37 +311,489 @@ class OpenAIClient:
             "stop": stop,
             "timeout": self.timeout,
         }
+        tools_digest = ""
         if tools:
-            params["tools"] = self._format_tools(tools)
+            params["tools"], tools_digest = self._format_tools_with_digest(tools)
             params["tool_choice"] = "auto"
 
         if response_format:
             params["response_format"] = response_format
 
+        if self.canonical_prompt and prompt_cache_key:
+            params["prompt_cache_key"] = self._prompt_cache_key(params, tools_digest)
+        return params
+
+    def _prompt_cache_key(self, params: dict, tools_digest: str) -> str:
+        """Key derived from the system prompt and tools, requests sharing that prefix share a key."""
+        system = [m["content"] for m in params["messages"] if m["role"] == "system"][:1]
+        prefix = json.dumps([params["model"], system, tools_digest], default=str)
+        return hashlib.sha256(prefix.encode()).hexdigest()[:32]
+
+    def chat_completions(
+        self,
+        messages: list,
+        tools: list = [],
+        stop=None,
+        response_format=None,
+        stream: bool = False,
+        on_delta: Callable[[LLMDelta], None] = None,
+        cache: bool = None,
+        cancel: threading.Event = None,
+        priority: Priority = Priority.INTERACTIVE,
+    ):
+        """Get completions for chat.
+
+        With ``stream=True`` the completion is streamed and ``on_delta`` is
+        called for every content / tool call fragment; the aggregated
+        response is returned once the stream is exhausted.
+
+        Successful responses are cached when ``cache`` is set, or by default
+        for deterministic calls (temperature 0) and with ``cache_responses``.
+
+        Setting ``cancel`` aborts the completion, closing the connection so no
+        more tokens are generated (a cancellable call is always streamed from
+        the API). The partial response is returned with ``finish_reason="cancelled"``.
+
+        Requests go through the API key's rate limiter, ``priority`` orders
+        them while they wait (background work such as summaries goes last).
+
+        docs: https://platform.openai.com/docs/guides/function-calling
+        """
+        if cache is None:
+            cache = self.cache_responses or self.temperature == 0
+        cache_key = None
+        if cache and self.cache is not None:
+            cache_key = self._cache_key(messages, tools, stop, response_format)
+            hit = self.cache.get(cache_key)
+            if hit is not None:
+                response = LLMResponse(**hit, cached=True)
+                if stream and on_delta and response.content:
+                    on_delta(LLMDelta(content=response.content))
+                return response
+
+        response = self._chat_completions(
+            messages, tools, stop, response_format, stream=stream, on_delta=on_delta, cancel=cancel,
+            priority=priority,
+        )
+        if cache_key and response.status and response.finish_reason != CANCELLED:
+            self.cache.set(cache_key, response.model_dump(exclude={"cached"}), ttl=self.cache_ttl)
+        return response
+
+    def _cache_key(self, messages: list, tools: list, stop, response_format) -> str:
+        params = self._build_params(messages, tools, stop, response_format, prompt_cache_key=False)
+        params.pop("timeout", None)
+        if tools:
+            # The digest stands in for the formatted tools, already computed once
+            params["tools"] = self._format_tools_with_digest(tools)[1]
+        return make_cache_key("llm", params)
+
+    def _chat_completions(
+        self, messages: list, tools: list, stop, response_format, stream: bool, on_delta, cancel=None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> LLMResponse:
+        if cancel is not None and cancel.is_set():
+            return _cancelled_response([])
+        if stream or cancel is not None:
+            # Streamed from the API even when the caller does not stream, so it can be aborted
+            deltas = self.stream_chat_completions(
+                messages, tools=tools, stop=stop, response_format=response_format, priority=priority
+            )
+            parts = []
+            try:
+                for delta in deltas:
+                    if delta.response is not None:
+                        return delta.response
+                    if cancel is not None and cancel.is_set():
+                        return _cancelled_response(parts)
+                    parts.append(delta.content)
+                    if on_delta and stream:
+                        on_delta(delta)
+            finally:
+                # Closes the HTTP stream when the loop was left early
+                deltas.close()
+            return LLMResponse(content="Error: stream ended without a response")
+
+        params = self._build_params(messages, tools, stop, response_format)
+
         try:
-            response: ChatCompletion = self.client.chat.completions.create(**params)
+            ticket, response = self._create(params, priority)
         except Exception as e:
-            print(f"Error: {e}")
+            logger.exception(f"LLM completion failed: {e}")
             return LLMResponse(content=f"Error: {e}")
 
+        self.limiter.release(ticket, response.usage.total_tokens if response.usage else None)
+        return _parse_response(response)
+
+    def _tools_size(self, formatted_tools: list) -> int:
+        """Serialised size of formatted tools, cached for the lists ``_format_tools`` reuses."""
+        with self._tools_cache_lock:
+            entry = self._tools_size_by_id.get(id(formatted_tools))
+            if entry is not None and entry[0] is formatted_tools:
+                return entry[1]
+        size = len(json.dumps(formatted_tools, default=str))
+        with self._tools_cache_lock:
+            self._tools_size_by_id[id(formatted_tools)] = (formatted_tools, size)
+            while len(self._tools_size_by_id) > 32:
+                self._tools_size_by_id.popitem(last=False)
+        return size
+
+    def _estimate_tokens(self, params: dict) -> int:
+        """Rough upper bound of the tokens a request counts against the TPM limit."""
+        size = len(json.dumps(params.get("messages", []), default=str))
+        size += self._tools_size(params.get("tools", []))
+        return size // 4 + params.get("max_tokens", self.max_tokens)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying ``error``, ``None`` to give up."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        delay = backoff_delay(error, attempt, base=self.backoff_base, cap=self.backoff_max)
+        if getattr(error, "status_code", None) == 429:
+            # Hold back every caller of this key, not just this one
+            self.limiter.pause(delay)
+        logger.warning(f"OpenAI request failed ({error}), retry {attempt + 1} in {delay:.2f}s")
+        return delay
+
+    def _create(self, params: dict, priority: Priority):
+        """Send a request through the rate limiter, retrying rate limited and transient errors.
+
+        Returns the limiter ticket (release it with the used tokens) and the response.
+        """
+        tokens = self._estimate_tokens(params)
+        attempt = 0
+        while True:
+            ticket = self.limiter.acquire(tokens, priority)
+            try:
+                return ticket, self.client.chat.completions.create(**params)
+            except Exception as e:
+                # A failed request used no tokens
+                self.limiter.release(ticket, 0)
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+    def _stream_params(self, messages: list, tools: list, stop, response_format) -> dict:
+        params = self._build_params(messages, tools, stop, response_format)
+        params["stream"] = True
+        params["stream_options"] = {"include_usage": True}
+        return params
+
+    def stream_chat_completions(
+        self, messages: list, tools: list = [], stop=None, response_format=None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Iterator[LLMDelta]:
+        """Stream completions for chat.
+
+        Yields an ``LLMDelta`` for every chunk that carries content or tool
+        call fragments. The final delta has ``response`` set to the
+        aggregated ``LLMResponse`` (also on errors).
+        """
+        params = self._stream_params(messages, tools, stop, response_format)
+        accumulator = _StreamAccumulator()
+        stream = ticket = None
+        try:
+            ticket, stream = self._create(params, priority)
+            for chunk in stream:
+                delta = accumulator.add(chunk)
+                if delta is not None:
+                    yield delta
+        except Exception as e:
+            logger.exception(f"LLM completion failed: {e}")
+            yield LLMDelta(response=LLMResponse(content=f"Error: {e}"))
+            return
+        finally:
+            if stream is not None:
+                stream.close()
+            if ticket is not None:
+                self.limiter.release(ticket, accumulator.used_tokens())
+
+        yield LLMDelta(response=accumulator.response())
+
+
+def _cancelled_response(parts: List[str]) -> LLMResponse:
+    return LLMResponse(
+        content="".join(parts),
+        finish_reason=CANCELLED,
+        status=LLMResponseStatus.SUCCESS,
+    )
+
+
+def _parse_response(response: ChatCompletion) -> LLMResponse:
+    return LLMResponse(
+        content=response.choices[0].message.content or "",
+        tool_calls=[
+            {
+                "id": tool_call.id,
+                "tool": {
+                    "name": tool_call.function.name,
+                    "arguments": json.loads(tool_call.function.arguments),
+                },
+                "type": tool_call.type,
+            }
+            for tool_call in response.choices[0].message.tool_calls
+        ]
+        if response.choices[0].message.tool_calls
+        else [],
+        finish_reason=response.choices[0].finish_reason,
+        send_tokens=response.usage.prompt_tokens,
+        recv_tokens=response.usage.completion_tokens,
+        total_tokens=response.usage.total_tokens,
+        cached_tokens=_cached_tokens(response.usage),
+        status=LLMResponseStatus.SUCCESS,
+    )
+
+
+class _StreamAccumulator:
+    """Aggregates streamed chunks into deltas and the final ``LLMResponse``."""
+
+    def __init__(self):
+        self.content_parts = []
+        self.tool_calls = {}
+        self.finish_reason = ""
+        self.usage = None
+
+    def add(self, chunk) -> Optional[LLMDelta]:
+        """Add a chunk, returns its delta if it carries content or tool call fragments."""
+        if chunk.usage:
+            self.usage = chunk.usage
+        if not chunk.choices:
+            return None
+
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+
+        fragments = []
+        for tc in choice.delta.tool_calls or []:
+            call = self.tool_calls.setdefault(
+                tc.index, {"id": "", "type": "function", "name": "", "arguments": ""}
+            )
+            fragment = {"index": tc.index, "id": tc.id, "name": None, "arguments": ""}
+            if tc.id:
+                call["id"] = tc.id
+            if tc.type:
+                call["type"] = tc.type
+            if tc.function:
+                if tc.function.name:
+                    call["name"] += tc.function.name
+                    fragment["name"] = tc.function.name
+                if tc.function.arguments:
+                    call["arguments"] += tc.function.arguments
+                    fragment["arguments"] = tc.function.arguments
+            fragments.append(fragment)
+
+        text = choice.delta.content or ""
+        if text:
+            self.content_parts.append(text)
+        if text or fragments:
+            return LLMDelta(content=text, tool_calls=fragments)
+        return None
+
+    def used_tokens(self) -> Optional[int]:
+        """Total tokens reported by the stream, ``None`` if it ended before the usage chunk."""
+        return self.usage.total_tokens if self.usage else None
+
+    def response(self) -> LLMResponse:
+        usage = self.usage
         return LLMResponse(
-            content=response.choices[0].message.content or "",
+            content="".join(self.content_parts),
             tool_calls=[
                 {
-                    "id": tool_call.id,
+                    "id": call["id"],
                     "tool": {
-                        "name": tool_call.function.name,
-                        "arguments": json.loads(tool_call.function.arguments),
+                        "name": call["name"],
+                        "arguments": json.loads(call["arguments"] or "{}"),
                     },
-                    "type": tool_call.type,
+                    "type": call["type"],
                 }
-                for tool_call in response.choices[0].message.tool_calls
-            ]
-            if response.choices[0].message.tool_calls
-            else [],
-            finish_reason=response.choices[0].finish_reason,
-            send_tokens=response.usage.prompt_tokens,
-            recv_tokens=response.usage.completion_tokens,
-            total_tokens=response.usage.total_tokens,
+                for _, call in sorted(self.tool_calls.items())
+            ],
+            finish_reason=self.finish_reason,
+            send_tokens=usage.prompt_tokens if usage else 0,
+            recv_tokens=usage.completion_tokens if usage else 0,
+            total_tokens=usage.total_tokens if usage else 0,
+            cached_tokens=_cached_tokens(usage),
             status=LLMResponseStatus.SUCCESS,
-        )
\ No newline at end of file
+        )
+
+
+class AsyncOpenAIClient(OpenAIClient):
+    """``OpenAIClient`` on ``openai.AsyncOpenAI``, completions are coroutines.
+
+    Shares request building, caching and response parsing with the sync client.
+    """
+
+    def _build_client(self, config: OpenaiConfig):
+        try:
+            import httpx
+            import openai
+        except ImportError:
+            raise ImportError("Please install OpenAI python library.")
+
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            timeout=self.timeout,
+        )
+        return openai.AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.api_base,
+            http_client=self.http_client,
+            max_retries=0,
+        )
+
+    async def chat_completions(
+        self,
+        messages: list,
+        tools: list = [],
+        stop=None,
+        response_format=None,
+        stream: bool = False,
+        on_delta: Callable[[LLMDelta], None] = None,
+        cache: bool = None,
+        cancel: threading.Event = None,
+        priority: Priority = Priority.INTERACTIVE,
+    ):
+        """Async variant of ``OpenAIClient.chat_completions``."""
+        if cache is None:
+            cache = self.cache_responses or self.temperature == 0
+        cache_key = None
+        if cache and self.cache is not None:
+            cache_key = self._cache_key(messages, tools, stop, response_format)
+            hit = await self.cache.aget(cache_key)
+            if hit is not None:
+                response = LLMResponse(**hit, cached=True)
+                if stream and on_delta and response.content:
+                    on_delta(LLMDelta(content=response.content))
+                return response
+
+        response = await self._chat_completions(
+            messages, tools, stop, response_format, stream=stream, on_delta=on_delta, cancel=cancel,
+            priority=priority,
+        )
+        if cache_key and response.status and response.finish_reason != CANCELLED:
+            await self.cache.aset(cache_key, response.model_dump(exclude={"cached"}), ttl=self.cache_ttl)
+        return response
+
+    async def _chat_completions(
+        self, messages: list, tools: list, stop, response_format, stream: bool, on_delta, cancel=None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> LLMResponse:
+        if cancel is not None and cancel.is_set():
+            return _cancelled_response([])
+        if stream or cancel is not None:
+            # Streamed from the API even when the caller does not stream, so it can be aborted
+            deltas = self.stream_chat_completions(
+                messages, tools=tools, stop=stop, response_format=response_format, priority=priority
+            )
+            parts = []
+            try:
+                async for delta in deltas:
+                    if delta.response is not None:
+                        return delta.response
+                    if cancel is not None and cancel.is_set():
+                        return _cancelled_response(parts)
+                    parts.append(delta.content)
+                    if on_delta and stream:
+                        on_delta(delta)
+            finally:
+                await deltas.aclose()
+            return LLMResponse(content="Error: stream ended without a response")
+
+        params = self._build_params(messages, tools, stop, response_format)
+
+        try:
+            ticket, response = await self._create(params, priority)
+        except Exception as e:
+            logger.exception(f"LLM completion failed: {e}")
+            return LLMResponse(content=f"Error: {e}")
+
+        self.limiter.release(ticket, response.usage.total_tokens if response.usage else None)
+        return _parse_response(response)
+
+    async def _create(self, params: dict, priority: Priority):
+        """Async variant of ``OpenAIClient._create``."""
+        tokens = self._estimate_tokens(params)
+        attempt = 0
+        while True:
+            ticket = await self.limiter.aacquire(tokens, priority)
+            try:
+                return ticket, await self.client.chat.completions.create(**params)
+            except Exception as e:
+                self.limiter.release(ticket, 0)
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def stream_chat_completions(
+        self, messages: list, tools: list = [], stop=None, response_format=None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> AsyncIterator[LLMDelta]:
+        """Async variant of ``OpenAIClient.stream_chat_completions``."""
+        params = self._stream_params(messages, tools, stop, response_format)
+        accumulator = _StreamAccumulator()
+        stream = ticket = None
+        try:
+            ticket, stream = await self._create(params, priority)
+            async for chunk in stream:
+                delta = accumulator.add(chunk)
+                if delta is not None:
+                    yield delta
+        except Exception as e:
+            logger.exception(f"LLM completion failed: {e}")
+            yield LLMDelta(response=LLMResponse(content=f"Error: {e}"))
+            return
+        finally:
+            if stream is not None:
+                await stream.close()
+            if ticket is not None:
+                self.limiter.release(ticket, accumulator.used_tokens())
+
+        yield LLMDelta(response=accumulator.response())
+
+
+_clients: Dict[str, OpenAIClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(config: OpenaiConfig = None) -> OpenAIClient:
+    """Return the process-wide ``OpenAIClient`` for ``config``.
+
+    Clients are keyed by their config (api_base, api_key, chat_model, ...) so
+    engines reuse the same keep-alive connection pool instead of paying for a
+    new TCP + TLS handshake on every message.
+    """
+    if config is None:
+        config = OpenaiConfig()
+    key = config.model_dump_json()
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = OpenAIClient(config)
+    return client
+
+
+_async_clients: Dict[str, AsyncOpenAIClient] = {}
+
+
+def get_async_llm_client(config: OpenaiConfig = None) -> AsyncOpenAIClient:
+    """Return the process-wide ``AsyncOpenAIClient`` for ``config``.
+
+    Async clients are bound to the event loop serving them, only use this from
+    the loop of the async server.
+    """
+    if config is None:
+        config = OpenaiConfig()
+    key = config.model_dump_json()
+    with _clients_lock:
+        client = _async_clients.get(key)
+        if client is None:
+            client = _async_clients[key] = AsyncOpenAIClient(config)
+    return client
@@ -0,0 +1,243 @@
+import asyncio
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import mcp.types
+from fastmcp import Client
+from fastmcp.client.messages import MessageHandler
+from fastmcp.exceptions import ToolError
+from mcp import Tool
+from pydantic import BaseModel
+
+from core.aio import arun_coroutine, run_coroutine
+
+logger = logging.getLogger(__name__)
+
+
+class MCPToolSpec(BaseModel):
+    """Discovered MCP tool with its LLM payload built once."""
+
+    name: str
+    description: str
+    parameters: dict
+    llm_format: dict
+    # Full input schema (with ``required``), arguments are validated against it
+    input_schema: dict = {}
+
+    @classmethod
+    def from_tool(cls, tool: Tool) -> "MCPToolSpec":
+        description = tool.description or ""
+        parameters = {"type": "object", "properties": tool.inputSchema.get("properties", {})}
+        return cls(
+            name=tool.name,
+            description=description,
+            parameters=parameters,
+            llm_format={"name": tool.name, "description": description, "parameters": parameters},
+            input_schema=tool.inputSchema or {},
+        )
+
+
+class _ToolListChangedHandler(MessageHandler):
+    def __init__(self, manager: "MCPManager"):
+        self.manager = manager
+
+    async def on_tool_list_changed(self, message: mcp.types.ToolListChangedNotification):
+        logger.info("MCP server reported tools/list_changed, invalidating tool catalog")
+        self.manager.invalidate_tools()
+
+
+class MCPManager:
+    """Long-lived MCP client for one server config.
+
+    Servers are started once, on first use, and the session is kept open on
+    the shared background loop. A dropped session is reconnected on the next
+    call.
+    """
+
+    def __init__(self, config: dict, timeout: float = None, tools_ttl: float = None):
+        """
+        :param dict config: MCP config in the FastMCP ``mcpServers`` format.
+        :param float timeout: Timeout in seconds for a single MCP request.
+        :param float tools_ttl: Seconds a discovered tool catalog stays valid.
+        """
+        self.config = config
+        self.timeout = timeout or float(os.getenv("MCP_TIMEOUT", "120"))
+        self.tools_ttl = tools_ttl if tools_ttl is not None else float(os.getenv("MCP_TOOLS_TTL", "300"))
+        self._client: Client = None
+        self._lock: asyncio.Lock = None
+        self._tools: List[MCPToolSpec] = None
+        self._tools_loaded_at = 0.0
+        self._tools_lock = threading.Lock()
+
+    async def _ensure_connected(self) -> Client:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._client is None or not self._client.is_connected():
+                await self._close_client()
+                client = Client(self.config, message_handler=_ToolListChangedHandler(self))
+                await client.__aenter__()
+                self._client = client
+                # Tools may have changed while we were disconnected
+                self.invalidate_tools()
+                logger.info("MCP session connected")
+        return self._client
+
+    async def _close_client(self):
+        client, self._client = self._client, None
+        if client is None:
+            return
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Error closing MCP session: {e}")
+
+    async def _call(self, fn: Callable[[Client], Awaitable[Any]], retry: bool = False):
+        """Run ``fn`` against the session, the next call reconnects if it dropped.
+
+        :param bool retry: Re-run ``fn`` once on a fresh session after a drop.
+            Only for idempotent requests, a tool call may already have run on
+            the server before the session dropped.
+        """
+        client = await self._ensure_connected()
+        try:
+            return await fn(client)
+        except ToolError:
+            raise
+        except Exception as e:
+            if client.is_connected():
+                raise
+            if not retry:
+                logger.warning(f"MCP session dropped ({e}), reconnecting on the next call")
+                raise ConnectionError(f"MCP session dropped during the request: {e}") from e
+            logger.warning(f"MCP session dropped ({e}), reconnecting")
+            client = await self._ensure_connected()
+            return await fn(client)
+
+    # Coroutines below run on the background loop that owns the session
+    async def _list_tools(self) -> List[Tool]:
+        return await self._call(lambda client: client.list_tools(), retry=True)
+
+    async def _call_tool(self, tool_name: str, arguments: dict, progress_handler=None):
+        return await self._call(
+            lambda client: client.call_tool(
+                tool_name, arguments=arguments, progress_handler=progress_handler
+            )
+        )
+
+    def list_tools(self) -> List[Tool]:
+        return run_coroutine(self._list_tools(), timeout=self.timeout)
+
+    def call_tool(self, tool_name: str, arguments: dict, progress_handler=None):
+        """
+        :param progress_handler: ``async (progress, total, message)`` called for the
+            server's progress notifications, on the background loop.
+        """
+        return run_coroutine(
+            self._call_tool(tool_name, arguments, progress_handler), timeout=self.timeout
+        )
+
+    def close(self):
+        run_coroutine(self._close_client(), timeout=5)
+
+    # Awaitable from any event loop (e.g. the async server's)
+    async def alist_tools(self) -> List[Tool]:
+        return await arun_coroutine(self._list_tools(), timeout=self.timeout)
+
+    async def acall_tool(self, tool_name: str, arguments: dict, progress_handler=None):
+        return await arun_coroutine(
+            self._call_tool(tool_name, arguments, progress_handler), timeout=self.timeout
+        )
+
+    async def aclose(self):
+        await arun_coroutine(self._close_client(), timeout=5)
+
+    def invalidate_tools(self):
+        """Drop the cached tool catalog, the next ``get_tools`` rediscovers."""
+        self._tools = None
+
+    def get_tools(self) -> List[MCPToolSpec]:
+        """Return the cached tool catalog, rediscovering it when expired or invalidated."""
+        with self._tools_lock:
+            tools = self._tools
+            if tools is None or time.monotonic() - self._tools_loaded_at > self.tools_ttl:
+                tools = [MCPToolSpec.from_tool(tool) for tool in self.list_tools()]
+                self._tools = tools
+                self._tools_loaded_at = time.monotonic()
+                logger.info(f"Discovered {len(tools)} MCP tools")
+        return tools
+
+    async def aget_tools(self) -> List[MCPToolSpec]:
+        """Async variant of ``get_tools``."""
+        tools = self._tools
+        if tools is None or time.monotonic() - self._tools_loaded_at > self.tools_ttl:
+            tools = [MCPToolSpec.from_tool(tool) for tool in await self.alist_tools()]
+            self._tools = tools
+            self._tools_loaded_at = time.monotonic()
+            logger.info(f"Discovered {len(tools)} MCP tools")
+        return tools
+
+
+_managers: Dict[str, MCPManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_mcp_manager(config: dict) -> MCPManager:
+    """Return the process-wide ``MCPManager`` for ``config``.
+
+    A manager whose config is no longer current is closed when a new one
+    replaces it.
+    """
+    key = json.dumps(config, sort_keys=True)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            stale = list(_managers.values())
+            _managers.clear()
+            manager = _managers[key] = MCPManager(config)
+        else:
+            stale = []
+
+    for old in stale:
+        try:
+            old.close()
+        except Exception as e:
+            logger.warning(f"Error closing stale MCP manager: {e}")
+    return manager
+
+
+_config_cache: Dict[str, Tuple[Tuple[float, int], dict]] = {}
+
+
+def load_mcp_config(config_path: str) -> dict:
+    """Load ``mcp.json``, re-reading it only when its mtime or size changed.
+
+    Raises ``FileNotFoundError`` / ``json.JSONDecodeError`` like ``json.load``.
+    """
+    stat = os.stat(config_path)
+    signature = (stat.st_mtime, stat.st_size)
+    cached = _config_cache.get(config_path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    _config_cache[config_path] = (signature, config)
+    return config
+
+
+@atexit.register
+def close_mcp_managers():
+    with _managers_lock:
+        managers = list(_managers.values())
+        _managers.clear()
+    for manager in managers:
+        try:
+            manager.close()
+        except Exception:
+            pass
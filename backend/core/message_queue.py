@@ -0,0 +1,79 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def _queue_url(url: str = None) -> str:
+    return url if url is not None else os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+
+
+def get_client_manager(url: str = None, write_only: bool = False):
+    """Socket.IO client manager that routes events between workers through a message queue.
+
+    Returns ``None`` (single worker, in-process manager) when no queue is
+    configured. Supported URLs:
+
+    - ``redis://`` / ``rediss://`` (needs ``redis``)
+    - ``kafka://`` (needs ``kafka-python``)
+    - ``zmq+tcp://`` (needs ``pyzmq``)
+    - anything Kombu understands, e.g. ``amqp://``, plus the offline stand-ins
+      ``filesystem://`` (workers on one host share ``SOCKETIO_QUEUE_FOLDER``)
+      and ``memory://`` (single process, for tests) (needs ``kombu``)
+
+    :param str url: Queue URL, ``SOCKETIO_MESSAGE_QUEUE`` by default.
+    :param bool write_only: Only emit (e.g. from a background process), never receive.
+    """
+    import socketio
+
+    url = _queue_url(url)
+    if not url:
+        return None
+
+    if url.startswith(("redis://", "rediss://")):
+        manager = socketio.RedisManager(url, write_only=write_only)
+    elif url.startswith("kafka://"):
+        manager = socketio.KafkaManager(url, write_only=write_only)
+    elif url.startswith("zmq"):
+        manager = socketio.ZmqManager(url, write_only=write_only)
+    else:
+        connection_options = {}
+        if url.startswith("filesystem://"):
+            folder = os.path.abspath(os.getenv("SOCKETIO_QUEUE_FOLDER", ".socketio-queue"))
+            os.makedirs(os.path.join(folder, "control"), exist_ok=True)
+            connection_options["transport_options"] = {
+                "data_folder_in": folder,
+                "data_folder_out": folder,
+                "control_folder": os.path.join(folder, "control"),
+            }
+        manager = socketio.KombuManager(
+            url, write_only=write_only, connection_options=connection_options
+        )
+
+    logger.info(f"Using Socket.IO message queue {url.split('://')[0]}://")
+    return manager
+
+
+def get_async_client_manager(url: str = None, write_only: bool = False):
+    """``get_client_manager`` for ``socketio.AsyncServer``.
+
+    Supports ``redis://`` / ``rediss://`` (needs ``redis``) and ``amqp://``
+    (needs ``aio-pika``).
+    """
+    import socketio
+
+    url = _queue_url(url)
+    if not url:
+        return None
+
+    if url.startswith(("redis://", "rediss://")):
+        manager = socketio.AsyncRedisManager(url, write_only=write_only)
+    elif url.startswith("amqp://"):
+        manager = socketio.AsyncAioPikaManager(url, write_only=write_only)
+    else:
+        raise ValueError(
+            f"Unsupported SOCKETIO_MESSAGE_QUEUE {url!r} for the asyncio server, expected redis:// or amqp://"
+        )
+
+    logger.info(f"Using Socket.IO message queue {url.split('://')[0]}://")
+    return manager
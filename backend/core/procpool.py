@@ -0,0 +1,241 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How often a waiting call checks on the worker running it
+POLL_SECONDS = 0.2
+# Time a finished worker's result may take to arrive after the worker exited
+# (workers exit after ``max_tasks_per_child`` calls)
+EXIT_GRACE_SECONDS = 1.0
+
+_KILL = getattr(signal, "SIGKILL", signal.SIGTERM)
+
+# Queue the worker reports ``(call_id, pid)`` on when it starts a call, set by ``_init_worker``
+_started = None
+
+
+def _init_worker(memory_limit_mb: int, started):
+    """Runs once in every worker process, caps its address space."""
+    global _started
+    _started = started
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+    except ImportError:
+        # No rlimits on this platform (Windows), run unlimited
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _run_tool(call_id: int, tool_cls: type, args: tuple, kwargs: dict):
+    """Runs in a worker process: report the worker, then instantiate the tool without a session and run it."""
+    _started.put((call_id, os.getpid()))
+    return tool_cls(session=None).run(*args, **kwargs)
+
+
+def _alive(pid: int) -> bool:
+    if os.name == "nt":
+        # Signal 0 is not a liveness probe on Windows, rely on the timeout there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class ToolProcessPool:
+    """Process pool running the ``run`` of CPU-bound tools (``BaseTool.cpu_bound``).
+
+    Workers are spawned (never forked from the server), capped at
+    ``memory_limit_mb`` of address space and replaced after
+    ``max_tasks_per_child`` calls. Every call reports the pid of the worker
+    running it: a call over its timeout kills only that worker, and a worker
+    dying (e.g. out of memory) fails only the call it was running. The pool
+    replaces the lost worker, the other calls keep running.
+
+    The timeout counts from the moment a worker picks the call up, calls
+    waiting for a free worker do not time out.
+    """
+
+    def __init__(self, max_workers: int = None, max_tasks_per_child: int = None, memory_limit_mb: int = None):
+        """
+        :param int max_workers: Worker processes, CPU-bound calls running at once.
+        :param int max_tasks_per_child: Calls a worker serves before it is replaced.
+        :param int memory_limit_mb: Address space limit of a worker in MB, 0 for no limit.
+        """
+        self.max_workers = max_workers or int(
+            os.getenv("TOOL_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1)))
+        )
+        self.max_tasks_per_child = max_tasks_per_child or int(os.getenv("TOOL_PROCESS_MAX_TASKS", "100"))
+        if memory_limit_mb is None:
+            memory_limit_mb = int(os.getenv("TOOL_PROCESS_MEMORY_MB", "1024"))
+        self.memory_limit_mb = memory_limit_mb
+        self._pool = None
+        self._started = None
+        self._lock = threading.Lock()
+        self._call_ids = itertools.count()
+        # Calls submitted and not finished, and the worker pid and start time of the running ones
+        self._calls: Set[int] = set()
+        self._workers: Dict[int, Tuple[int, float]] = {}
+        self._stats = {"calls": 0, "timeouts": 0, "crashes": 0}
+
+    def _submit(self, tool, args: tuple, kwargs: dict, callback=None, error_callback=None):
+        """Queue the call, returns its id and ``AsyncResult``."""
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context("spawn")
+                # Written synchronously, a worker dying right after starting a call still reports it
+                self._started = context.SimpleQueue()
+                self._pool = context.Pool(
+                    processes=self.max_workers,
+                    initializer=_init_worker,
+                    initargs=(self.memory_limit_mb, self._started),
+                    maxtasksperchild=self.max_tasks_per_child,
+                )
+            call_id = next(self._call_ids)
+            self._calls.add(call_id)
+            self._stats["calls"] += 1
+            result = self._pool.apply_async(
+                _run_tool, (call_id, type(tool), args, kwargs), callback=callback, error_callback=error_callback
+            )
+        return call_id, result
+
+    def _worker(self, call_id: int) -> Optional[Tuple[int, float]]:
+        """``(pid, started_at)`` of the worker running the call, ``None`` while it waits for one."""
+        with self._lock:
+            while not self._started.empty():
+                reported, pid = self._started.get()
+                if reported in self._calls:
+                    self._workers[reported] = (pid, time.monotonic())
+            return self._workers.get(call_id)
+
+    def _finished(self, call_id: int):
+        with self._lock:
+            self._calls.discard(call_id)
+            self._workers.pop(call_id, None)
+
+    def _check(self, call_id: int, tool_name: str, timeout: float) -> Optional[Exception]:
+        """Error to fail a call that is not done with, ``None`` to keep waiting.
+
+        A call over its timeout gets its worker killed. A dead worker is only
+        reported after ``EXIT_GRACE_SECONDS``, by the caller re-checking the result.
+        """
+        worker = self._worker(call_id)
+        if worker is None:
+            return None
+        pid, started_at = worker
+        if time.monotonic() - started_at >= timeout:
+            logger.warning(f"Killing tool worker {pid}, {tool_name} timed out after {timeout}s")
+            try:
+                os.kill(pid, _KILL)
+            except ProcessLookupError:
+                pass
+            with self._lock:
+                self._stats["timeouts"] += 1
+            return TimeoutError(f"Tool {tool_name} timed out after {timeout}s")
+        if not _alive(pid):
+            return RuntimeError(f"Tool {tool_name} worker process died (memory limit or crash)")
+        return None
+
+    def _crashed(self, tool_name: str):
+        logger.warning(f"Tool worker running {tool_name} died")
+        with self._lock:
+            self._stats["crashes"] += 1
+
+    def call(self, tool, args: tuple, kwargs: dict, timeout: float):
+        """Run ``tool.run(*args, **kwargs)`` in a worker and return its result.
+
+        :raises TimeoutError: The call ran longer than ``timeout`` seconds.
+        :raises RuntimeError: The worker died.
+        """
+        call_id, result = self._submit(tool, args, kwargs)
+        try:
+            while not result.ready():
+                result.wait(POLL_SECONDS)
+                if result.ready():
+                    break
+                error = self._check(call_id, tool.name, timeout)
+                if isinstance(error, RuntimeError):
+                    result.wait(EXIT_GRACE_SECONDS)
+                    if result.ready():
+                        break
+                    self._crashed(tool.name)
+                if error is not None:
+                    raise error
+            return result.get()
+        finally:
+            self._finished(call_id)
+
+    async def acall(self, tool, args: tuple, kwargs: dict, timeout: float):
+        """Async variant of ``call``, awaits the worker without blocking the loop."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def settle(setter, value):
+            if not future.done():
+                setter(value)
+
+        call_id, _ = self._submit(
+            tool,
+            args,
+            kwargs,
+            callback=lambda value: loop.call_soon_threadsafe(settle, future.set_result, value),
+            error_callback=lambda e: loop.call_soon_threadsafe(settle, future.set_exception, e),
+        )
+        try:
+            while not future.done():
+                await asyncio.wait({future}, timeout=POLL_SECONDS)
+                if future.done():
+                    break
+                error = self._check(call_id, tool.name, timeout)
+                if isinstance(error, RuntimeError):
+                    await asyncio.wait({future}, timeout=EXIT_GRACE_SECONDS)
+                    if future.done():
+                        break
+                    self._crashed(tool.name)
+                if error is not None:
+                    raise error
+            return future.result()
+        finally:
+            self._finished(call_id)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": self._pool is not None,
+                "pending": len(self._calls),
+                **self._stats,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.terminate()
+
+
+_pool: Optional[ToolProcessPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_tool_pool() -> ToolProcessPool:
+    """Return the process-wide ``ToolProcessPool``, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ToolProcessPool()
+        return _pool
@@ -0,0 +1,242 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS = {408, 409, 429}
+
+# How often an async waiter re-checks the limiter
+ASYNC_POLL_SECONDS = 0.05
+
+
+class Priority(IntEnum):
+    """Order in which waiting calls get through the limiter, lower goes first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class TokenBucket:
+    """Token bucket holding up to ``capacity`` refilled evenly over a minute.
+
+    Not thread-safe by itself, ``RateLimiter`` guards it.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken, 0 if it can be taken now."""
+        self._refill()
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float):
+        """Return (or, when negative, further charge) ``amount``."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _Ticket:
+    __slots__ = ("tokens",)
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+
+
+class RateLimiter:
+    """Client-side scheduler for the calls made with one API key.
+
+    Calls wait for a request and a token budget (per minute), and for one of
+    ``max_concurrency`` slots. Waiting calls are served by priority, then in
+    arrival order, so background work never starves interactive chats.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0, max_concurrency: int = 0):
+        """
+        :param int rpm: Requests per minute, 0 for no limit.
+        :param int tpm: Tokens per minute, 0 for no limit.
+        :param int max_concurrency: Calls in flight at once, 0 for no limit.
+        """
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _try_acquire(self, entry: tuple, tokens: int) -> Optional[float]:
+        """Acquire for ``entry`` if it is next in line, else return how long to wait (``None`` = until notified)."""
+        if self._waiters[0] is not entry:
+            return None
+        if self.max_concurrency and self._in_flight >= self.max_concurrency:
+            return None
+        wait = max(
+            self._paused_until - time.monotonic(),
+            self.requests.wait_time(1) if self.requests else 0.0,
+            self.tokens.wait_time(tokens) if self.tokens else 0.0,
+        )
+        if wait > 0:
+            return wait
+
+        heapq.heappop(self._waiters)
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(tokens)
+        self._in_flight += 1
+        # The next waiter may be able to go as well
+        self._cond.notify_all()
+        return 0.0
+
+    def _enqueue(self, priority: Priority) -> tuple:
+        entry = (int(priority), next(self._seq))
+        heapq.heappush(self._waiters, entry)
+        return entry
+
+    def _dequeue(self, entry: tuple):
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self._cond.notify_all()
+
+    def _clip(self, tokens: int) -> int:
+        # A call larger than the whole budget waits for a full bucket
+        return int(min(tokens, self.tokens.capacity)) if self.tokens else tokens
+
+    def acquire(self, tokens: int, priority: Priority = Priority.INTERACTIVE) -> _Ticket:
+        """Block until a call estimated at ``tokens`` may be sent."""
+        tokens = self._clip(tokens)
+        with self._cond:
+            entry = self._enqueue(priority)
+            try:
+                while True:
+                    wait = self._try_acquire(entry, tokens)
+                    if wait == 0.0:
+                        return _Ticket(tokens)
+                    self._cond.wait(wait)
+            except BaseException:
+                self._dequeue(entry)
+                raise
+
+    async def aacquire(self, tokens: int, priority: Priority = Priority.INTERACTIVE) -> _Ticket:
+        """Async variant of ``acquire``, waits without blocking the event loop."""
+        tokens = self._clip(tokens)
+        with self._cond:
+            entry = self._enqueue(priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_acquire(entry, tokens)
+                if wait == 0.0:
+                    return _Ticket(tokens)
+                await asyncio.sleep(min(wait or ASYNC_POLL_SECONDS, ASYNC_POLL_SECONDS))
+        except BaseException:
+            with self._cond:
+                self._dequeue(entry)
+            raise
+
+    def release(self, ticket: _Ticket, used_tokens: int = None):
+        """Free the call's slot and settle its token estimate against ``used_tokens``.
+
+        :param int used_tokens: Tokens the call actually used, ``None`` keeps the estimate.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if self.tokens and used_tokens is not None:
+                self.tokens.give(ticket.tokens - used_tokens)
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        """Hold back every call for ``seconds``, e.g. after a 429 with ``Retry-After``."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked to wait (``retry-after-ms`` / ``retry-after`` headers)."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether ``error`` is a rate limit, timeout, connection or server error."""
+    try:
+        import openai
+    except ImportError:
+        return False
+
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+def backoff_delay(error: Exception, attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Jittered exponential backoff for retry ``attempt`` (0-based), at least the server's ``Retry-After``."""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    server_delay = retry_after(error)
+    if server_delay is not None:
+        delay = server_delay + random.uniform(0, base)
+    return delay
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(key: str, rpm: int = 0, tpm: int = 0, max_concurrency: int = 0) -> RateLimiter:
+    """Return the process-wide ``RateLimiter`` for ``key`` (e.g. an API key).
+
+    The limits only apply to the first call for a key.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = RateLimiter(rpm, tpm, max_concurrency)
+    return limiter
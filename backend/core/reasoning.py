@@ -1,12 +1,15 @@
-import asyncio
 import json
 import logging
-from typing import List
-from mcp import Tool
+import os
+import threading
+import time
+from typing import Dict, List, Optional
 
 from tools.base import BaseTool, ToolResponse
 from core.enums import ToolStatus
+from database.db import SQLiteDB
 from core.session import (
+    Emitter,
     Session,
     OutputMessage,
     InputMessage,
@@ -14,27 +17,61 @@ from core.session import (
     RoleTypes,
     MsgStatus,
     ToolContent,
+    ToolProgress,
     TextContent,
 )
-from core.llm import OpenAIClient, LLMResponse
-from fastmcp import Client
+from core.context import ContextWindowManager
+from core.executor import ToolExecutor
+from core.llm import LLMResponse, LLMDelta
+from core.router import get_llm
+from core.mcp_manager import MCPManager, get_mcp_manager, load_mcp_config
+from tools.mcp_tool import MCPTool
+from tools.read_tool_output import ReadToolOutputTool
+from tools.registry import ToolRegistry
+from core import blobs
 
 logger = logging.getLogger(__name__)
 
+# Engines currently running in this process, by output message id
+_active_engines: Dict[str, "ReasoningEngine"] = {}
+_active_engines_lock = threading.Lock()
 
-def _run_async(coro):
-    """Run an async coroutine whether or not a loop is already running.
-    - If no loop: use asyncio.run
-    - If inside a running loop: run in a separate thread with its own loop
+
+def stop_engines(session_id: str, msg_id: str = None) -> int:
+    """Cancel the running engines of ``session_id``, returns how many were cancelled.
+
+    :param str session_id: Session whose engines to cancel.
+    :param str msg_id: Only cancel the engine answering this input or output message.
+    """
+    with _active_engines_lock:
+        engines = [
+            engine
+            for engine in _active_engines.values()
+            if engine.session.session_id == session_id
+            and msg_id in (None, engine.input_message.msg_id, engine.output_message.msg_id)
+        ]
+    for engine in engines:
+        engine.cancel()
+    return len(engines)
+
+
+def resync_message(db: SQLiteDB, session_id: str, msg_id: str, emitter: Emitter) -> bool:
+    """Send a full snapshot of a message through ``emitter``, returns whether it was found.
+
+    Messages still being generated come from their engine (with the current
+    ``seq``), finished ones from the database.
     """
-    try:
-        asyncio.get_running_loop()
-    except RuntimeError:
-        return asyncio.run(coro)
-    else:
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
-            return ex.submit(asyncio.run, coro).result()
+    with _active_engines_lock:
+        engine = _active_engines.get(msg_id)
+    if engine is not None and engine.session.session_id == session_id:
+        engine.output_message.resync(emitter)
+        return True
+
+    stored = db.get_conversation(session_id, msg_id)
+    if stored is None:
+        return False
+    emitter("chat", {**stored, "seq": None})
+    return True
 
 
 class ReasoningEngine:
@@ -44,23 +81,39 @@ class ReasoningEngine:
         input_message: InputMessage,
         session: Session,
         mcp_config_path: str = None,
+        stream: bool = True,
     ):
         self.input_message = input_message
         self.session = session
         self.system_prompt = system_prompt
-        self.max_iterations = 10
-        self.llm = OpenAIClient()
-        self.tools: List[BaseTool] = []
+        # Budgets for one run: LLM rounds, total tokens and wall-clock seconds
+        self.max_iterations = int(os.getenv("ENGINE_MAX_ITERATIONS", "10"))
+        self.max_total_tokens = int(os.getenv("ENGINE_MAX_TOKENS", "200000"))
+        self.max_duration = float(os.getenv("ENGINE_MAX_SECONDS", "300"))
+        self.used_tokens = 0
+        self.deadline: Optional[float] = None
+        self.llm = get_llm()
+        self.context_manager = ContextWindowManager(llm=self.llm)
+        self.tools = ToolRegistry()
+        self.mcp: Optional[MCPManager] = None
+        self.executor = ToolExecutor()
         self.stop_flag = False
+        # Set when the user stops the generation, aborts streaming and tool calls
+        self.cancel_event = threading.Event()
+        self.stream = stream
         self.output_message: OutputMessage = self.session.output_message
+        # Index of the text content currently being streamed into, if any
+        self._stream_index: Optional[int] = None
+
+        if blobs.inline_limit():
+            # Lets the LLM page through tool outputs that were truncated
+            self.tools.register(ReadToolOutputTool(self.session))
 
         if mcp_config_path is None:
-            import os
             mcp_config_path = os.path.join(os.path.dirname(__file__), "..", "mcp.json")
         
         try:
-            with open(mcp_config_path, "r") as f:
-                self.mcp_config = json.load(f)
+            self.mcp_config = load_mcp_config(mcp_config_path)
             self._init_mcp_sync()
         except FileNotFoundError:
             logger.warning(f"MCP config file not found at {mcp_config_path}. MCP tools will not be available.")
@@ -76,7 +129,7 @@ class ReasoningEngine:
     # MCP integration
     # -----------------
     def _init_mcp_sync(self):
-        """Load MCP tools once, without eventlet or manual loop juggling."""
+        """Load MCP tools from the process-wide MCP manager's cached catalog."""
         
         # Skip MCP initialization if config is empty (file loading failed)
         if not self.mcp_config:
@@ -84,64 +137,13 @@ class ReasoningEngine:
             return
 
         try:
-            tools: List[Tool] = _run_async(self._list_mcp_tools())
-            print(f"Tools: {tools}")
-            for tool in tools:
-                mcp_tool = self._wrap_mcp_tool(
-                    tool_name=tool.name,
-                    tool_description=tool.description or "",
-                    tool_parameters=tool.inputSchema.get("properties", {}),
-                )
-                self.tools.append(mcp_tool)
+            self.mcp = get_mcp_manager(self.mcp_config)
+            self.tools.extend(
+                MCPTool(self.session, self.mcp, spec) for spec in self.mcp.get_tools()
+            )
         except Exception as e:
             logger.error(f"Failed to initialize MCP client: {e}")
 
-    async def _list_mcp_tools(self) -> List[Tool]:
-        mcp_client = Client(self.mcp_config)
-        async with mcp_client:
-            return await mcp_client.list_tools()
-
-    def _wrap_mcp_tool(self, tool_name: str, tool_description: str, tool_parameters: dict):
-        client = Client(self.mcp_config)
-
-        class MCPTool(BaseTool):
-            def __init__(self, session: Session):
-                super().__init__(session)
-
-            @property
-            def name(self):
-                return tool_name
-
-            @property
-            def description(self):
-                return tool_description
-
-            @property
-            def parameters(self):
-                return {"type": "object", "properties": tool_parameters}
-
-            def to_llm_format(self):
-                return {
-                    "name": tool_name,
-                    "description": tool_description,
-                    "parameters": {"type": "object", "properties": tool_parameters},
-                }
-
-            def run(self, **kwargs) -> ToolResponse:
-                try:
-                    result = _run_async(self._call_tool_async(tool_name, kwargs))
-                    return ToolResponse(status=ToolStatus.SUCCESS, message="", data=result.data)
-                except Exception as e:
-                    logger.error(f"Tool call failed for {tool_name}: {e}")
-                    return ToolResponse(status=ToolStatus.ERROR, message=str(e), data={"error": str(e)})
-
-
-            async def _call_tool_async(self, tool_name: str, arguments: dict):
-                async with client:
-                    return await client.call_tool(tool_name, arguments=arguments)
-
-        return MCPTool(self.session)
-
     # -----------------
     # Engine plumbing
     # -----------------
@@ -168,48 +170,169 @@ class ReasoningEngine:
         self.session.reasoning_context.append(input_context)
 
     def _append_and_publish_text(self, text: str, status: MsgStatus):
+        self._append_text(text, status)
+        self.output_message.publish()
+
+    def _append_text(self, text: str, status: MsgStatus):
+        """Add the final text of a round to the context and the output message."""
         self.session.reasoning_context.append(
             ContextMessage(content=text, role=RoleTypes.assistant)
         )
-        self.output_message.content.append(TextContent(text=text, type="text"))
+        if self._stream_index is not None and status == MsgStatus.success:
+            # Text was already streamed, settle it with the aggregated content
+            self.output_message.content[self._stream_index].text = text
+        else:
+            self.output_message.content.append(TextContent(text=text, type="text"))
+        self._stream_index = None
         self.output_message.status = status
-        self.output_message.publish()
 
-    def run_tool(self, tool_name: str, **kwargs) -> ToolResponse:
-        tool_content = ToolContent(
-            tool_name=tool_name,
-            tool_args=kwargs,
-            tool_response=None,
-            tool_status=ToolStatus.PROGRESS,
+    def _on_delta(self, delta: LLMDelta):
+        if not delta.content:
+            return
+        if self._stream_index is None:
+            self.output_message.content.append(TextContent(text="", type="text"))
+            self._stream_index = len(self.output_message.content) - 1
+        self.output_message.publish_delta(self._stream_index, delta.content)
+
+    def _chat_completions(self, tools: list = []) -> LLMResponse:
+        """Call the LLM with the reasoning context fitted to the token budget, streaming text deltas if enabled."""
+        self._stream_index = None
+        context = self.context_manager.fit(self.session.reasoning_context)
+        return self.llm.chat_completions(
+            messages=[m.to_llm_msg() for m in context],
+            tools=tools,
+            stream=self.stream,
+            on_delta=self._on_delta,
+            cancel=self.cancel_event,
         )
-        self.output_message.content.append(tool_content)
-        self.output_message.publish()
 
-        tool = next((t for t in self.tools if t.name == tool_name), None)
-        if not tool:
-            response = ToolResponse(status=ToolStatus.ERROR, message=f"Tool {tool_name} not found", data={"error": f"Tool {tool_name} not found"})
-        else:
-            response = tool.safe_call(**kwargs)
+    def _apply_tool_response(self, tool_content: ToolContent, response: ToolResponse):
+        """Record a finished call on its content item, large outputs become a preview plus blob_ref."""
+        self._offload_tool_response(response)
+        self._record_tool_response(tool_content, response)
+
+    def _offload_tool_response(self, response: ToolResponse):
+        """Move a large output to the blob store, leaving a preview in ``response.data``."""
+        if response.blob_ref is None:
+            response.data, response.blob_ref = blobs.offload(self.session.db, response.data)
 
+    def _record_tool_response(self, tool_content: ToolContent, response: ToolResponse):
         tool_content.tool_status = response.status
         tool_content.tool_response = response.data
+        tool_content.cached = response.cached
+        tool_content.blob_ref = response.blob_ref
+        tool_content.tool_progress = None
+
+    def run_tools(self, tool_calls: List[dict]) -> List[ToolResponse]:
+        """Run the tool calls of one LLM turn concurrently.
+
+        Every call is published as in progress up front and its status is
+        published as soon as it finishes. Responses are returned in call order.
+        """
+        tool_contents = []
+        for tc in tool_calls:
+            tool_content = ToolContent(
+                tool_name=tc["tool"]["name"],
+                tool_args=tc["tool"]["arguments"],
+                tool_response=None,
+                tool_status=ToolStatus.PROGRESS,
+            )
+            self.output_message.content.append(tool_content)
+            tool_contents.append(tool_content)
         self.output_message.publish()
-        return response
+
+        def on_done(index: int, response: ToolResponse):
+            self._apply_tool_response(tool_contents[index], response)
+            self.output_message.publish()
+
+        def on_progress(index: int, progress: ToolProgress):
+            tool_contents[index].tool_progress = progress
+            self.output_message.publish()
+
+        calls = [
+            (
+                self.tools.get(tc["tool"]["name"]),
+                tc["tool"]["name"],
+                tc["tool"]["arguments"],
+            )
+            for tc in tool_calls
+        ]
+        return self.executor.run(
+            calls,
+            on_done=on_done,
+            cancel=self.cancel_event,
+            on_progress=on_progress,
+            validate=self.tools.validate,
+        )
 
     def stop(self):
         self.stop_flag = True
 
+    def cancel(self):
+        """Stop the generation on behalf of the user, safe to call from any thread."""
+        logger.info(f"Cancelling reasoning for {self.output_message.msg_id}")
+        self.cancel_event.set()
+        self.stop()
+
+    def _publish_cancelled(self):
+        """Settle the output message of a cancelled run, keeping any streamed text."""
+        self._settle_cancelled()
+        self.output_message.publish()
+
+    def _settle_cancelled(self):
+        context = self.session.reasoning_context
+        if context and context[-1].role == RoleTypes.assistant and context[-1].tool_calls:
+            # Tool calls interrupted before their results, keep the context valid
+            for tc in context[-1].tool_calls:
+                context.append(
+                    ContextMessage(content="Cancelled by user", tool_call_id=tc["id"], role=RoleTypes.tool)
+                )
+        for item in self.output_message.content:
+            if isinstance(item, ToolContent) and item.tool_status == ToolStatus.PROGRESS:
+                item.tool_status = ToolStatus.ERROR
+
+        self.output_message.actions.append("Stopped by user")
+        if self._stream_index is not None:
+            text = self.output_message.content[self._stream_index].text
+            self._append_text(text, MsgStatus.success)
+        else:
+            self.output_message.status = MsgStatus.success
+
+    def _register(self):
+        with _active_engines_lock:
+            _active_engines[self.output_message.msg_id] = self
+
+    def _unregister(self):
+        with _active_engines_lock:
+            _active_engines.pop(self.output_message.msg_id, None)
+
+    def _budget_exhausted(self) -> bool:
+        """Whether this round must be the last one (rounds, tokens or time used up)."""
+        return (
+            self.iterations <= 0
+            or self.used_tokens >= self.max_total_tokens
+            or time.monotonic() >= self.deadline
+        )
+
     def step(self):
+        """Run one round: an LLM call, then any tool calls it requested.
+
+        The engine stops once the model answers without tool calls. When the
+        budget is used up the round is made without tools, forcing an answer.
+        """
         if self.stop_flag:
             return
 
-        # First LLM call
-        llm_response: LLMResponse = self.llm.chat_completions(
-            messages=[m.to_llm_msg() for m in self.session.reasoning_context],
-            tools=[t.to_llm_format() for t in self.tools],
+        final_round = self._budget_exhausted()
+        llm_response: LLMResponse = self._chat_completions(
+            tools=[] if final_round else self.tools.llm_format(),
         )
+        self.used_tokens += llm_response.total_tokens
         logger.info(f"LLM Response: {llm_response}")
 
+        if self.cancel_event.is_set():
+            return
+
         if not llm_response.status:
             self._append_and_publish_text(llm_response.content, MsgStatus.error)
             self.stop()
@@ -220,33 +343,39 @@ class ReasoningEngine:
             self.stop()
             return
 
-        # If tool calls were requested, run them synchronously, then do one final LLM call
+        # Run the requested tool calls concurrently, the next round sees their results
+        # Any text streamed alongside the tool calls stays as its own content item
+        self._stream_index = None
         self.session.reasoning_context.append(
             ContextMessage(content=llm_response.content, tool_calls=llm_response.tool_calls, role=RoleTypes.assistant)
         )
 
-        for tc in llm_response.tool_calls:
-            tr: ToolResponse = self.run_tool(tc["tool"]["name"], **tc["tool"]["arguments"])
+        tool_responses = self.run_tools(llm_response.tool_calls)
+        for tc, tr in zip(llm_response.tool_calls, tool_responses):
             self.session.reasoning_context.append(
                 ContextMessage(content=str(tr), tool_call_id=tc["id"], role=RoleTypes.tool)
             )
 
-        final_response: LLMResponse = self.llm.chat_completions(
-            messages=[m.to_llm_msg() for m in self.session.reasoning_context]
-        )
-        status = MsgStatus.success if final_response.status else MsgStatus.error
-        self._append_and_publish_text(final_response.content, status)
-        self.stop()
-
     def run(self, max_iterations: int | None = None):
         self.iterations = max_iterations or self.max_iterations
+        self.deadline = time.monotonic() + self.max_duration
         self.build_context()
         self.output_message.actions.append("Reasoning the message..")
         self.output_message.publish()
 
-        while self.iterations > 0 and not self.stop_flag:
-            self.iterations -= 1
-            self.step()
+        self._register()
+        try:
+            while self.iterations > 0 and not self.stop_flag:
+                self.iterations -= 1
+                self.step()
+            if self.cancel_event.is_set():
+                self._publish_cancelled()
+            elif not self.stop_flag:
+                # Budget ran out without a final answer
+                self.output_message.update_status(MsgStatus.error)
+        finally:
+            self._unregister()
+            self.executor.shutdown()
 
         self.session.save_context_messages()
         logger.info("Reasoning Engine Finished")
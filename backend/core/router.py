@@ -0,0 +1,377 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from core.base import BaseLLM, BaseLLMConfig
+from core.llm import CANCELLED, LLMDelta, LLMResponse, OpenaiConfig, get_async_llm_client, get_llm_client
+
+logger = logging.getLogger(__name__)
+
+# How often a routed call waiting on its backends checks for cancellation
+CANCEL_POLL_SECONDS = 0.1
+
+
+class BackendStats:
+    """Rolling latency and error rate of one backend."""
+
+    def __init__(self, window: int = 50, min_samples: int = 5):
+        """
+        :param int window: Number of latest calls the stats are computed over.
+        :param int min_samples: Calls needed before the latency percentiles are trusted.
+        """
+        self.min_samples = min_samples
+        self._calls = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.unhealthy_until = 0.0
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self._calls.append((latency, ok))
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._calls:
+                return 0.0
+            return sum(1 for _, ok in self._calls if not ok) / len(self._calls)
+
+    def latency(self, percentile: float = 0.5) -> Optional[float]:
+        """Latency percentile of the successful calls, ``None`` without enough samples."""
+        with self._lock:
+            latencies = sorted(latency for latency, ok in self._calls if ok)
+        if len(latencies) < self.min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(percentile * len(latencies)))]
+
+
+class LLMRouter(BaseLLM):
+    """Routes completions over several LLM backends.
+
+    Calls go to the healthy backend with the lowest median latency (backends
+    without enough samples are tried first). A failed call falls over to the
+    next backend, and a call with no response after the hedge deadline is
+    raced against the next backend: the first success wins and the others
+    are cancelled, recording the time they ran as a lower bound of their
+    latency so a backend that keeps losing is ranked down. A streamed call is hedged until its first token, then the
+    stream that emitted first is committed to. Streamed calls only fall over
+    before their first token.
+
+    A backend is unhealthy for ``cooldown`` seconds once its error rate goes
+    over ``max_error_rate``, then it is probed again.
+    """
+
+    def __init__(
+        self,
+        backends: List[BaseLLM],
+        hedge_after: float = None,
+        max_error_rate: float = None,
+        cooldown: float = None,
+        config: BaseLLMConfig = None,
+    ):
+        """
+        :param list backends: LLMs to route over, in order of preference.
+        :param float hedge_after: Seconds before a slow call is hedged, 0 uses the backend's p95 latency.
+        :param float max_error_rate: Rolling error rate (0-1) above which a backend is unhealthy.
+        :param float cooldown: Seconds an unhealthy backend is skipped.
+        """
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        super().__init__(config or BaseLLMConfig(llm_type="router"))
+        self.backends = backends
+        self.stats: Dict[int, BackendStats] = {id(b): BackendStats() for b in backends}
+        if hedge_after is None:
+            hedge_after = float(os.getenv("ROUTER_HEDGE_AFTER", "0"))
+        self.hedge_after = hedge_after
+        self.max_error_rate = max_error_rate or float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5"))
+        self.cooldown = cooldown or float(os.getenv("ROUTER_COOLDOWN", "30"))
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(4, 2 * len(backends)), thread_name_prefix="blaze-router"
+        )
+
+    def _ranked(self) -> List[BaseLLM]:
+        """Healthy backends fastest first, unhealthy ones last as a final resort."""
+        now = time.monotonic()
+        order = {id(b): i for i, b in enumerate(self.backends)}
+
+        def rank(backend: BaseLLM):
+            latency = self.stats[id(backend)].latency()
+            return (latency is not None, latency or 0.0, order[id(backend)])
+
+        healthy = [b for b in self.backends if self.stats[id(b)].unhealthy_until <= now]
+        unhealthy = [b for b in self.backends if self.stats[id(b)].unhealthy_until > now]
+        return sorted(healthy, key=rank) + sorted(
+            unhealthy, key=lambda b: self.stats[id(b)].unhealthy_until
+        )
+
+    def _record(self, attempt: "_Attempt", response: Optional[LLMResponse]):
+        backend = attempt.backend
+        stats = self.stats[id(backend)]
+        elapsed = time.monotonic() - attempt.launched_at
+        if response is not None and response.finish_reason == CANCELLED:
+            if attempt.lost:
+                # It would have taken at least this long, a lower bound keeps
+                # a backend that always loses from being ranked as unsampled
+                stats.record(elapsed, True)
+            # Cancelled by the caller, says nothing about the backend
+            return
+        ok = response is not None and bool(response.status)
+        stats.record(elapsed, ok)
+        if not ok and stats.error_rate() > self.max_error_rate:
+            stats.unhealthy_until = time.monotonic() + self.cooldown
+            logger.warning(
+                f"LLM backend {backend.chat_model} unhealthy for {self.cooldown}s "
+                f"(error rate {stats.error_rate():.0%})"
+            )
+
+    def _call(self, attempt: "_Attempt", messages: List[Dict], tools: List[Dict], **kwargs) -> LLMResponse:
+        backend = attempt.backend
+        response = None
+        try:
+            response = backend.chat_completions(messages=messages, tools=tools, **kwargs)
+            return response
+        except Exception as e:
+            logger.exception(f"LLM backend {backend.chat_model} failed: {e}")
+            response = LLMResponse(content=f"Error: {e}")
+            return response
+        finally:
+            self._record(attempt, response)
+
+    def _hedge_deadline(self, backend: BaseLLM) -> Optional[float]:
+        if self.hedge_after:
+            return self.hedge_after
+        return self.stats[id(backend)].latency(0.95)
+
+    def chat_completions(
+        self,
+        messages: List[Dict],
+        tools: List[Dict] = [],
+        stream: bool = False,
+        on_delta: Callable[[LLMDelta], None] = None,
+        cancel: threading.Event = None,
+        **kwargs,
+    ) -> LLMResponse:
+        """Get completions for chat from the best backend, see the class docstring.
+
+        Every attempt gets its own cancel event, set for the attempts that lose
+        a hedge (and for all of them once ``cancel`` is set) so they stop
+        generating and release their rate limit budget.
+        """
+        backends = self._ranked()
+        attempts: List[_Attempt] = []
+        lock = threading.Lock()
+        # Streamed attempt that emitted the first delta, only its deltas reach on_delta
+        winner: List[Optional[_Attempt]] = [None]
+
+        def launch() -> _Attempt:
+            attempt = _Attempt(backends.pop(0))
+
+            def forward(delta: LLMDelta):
+                with lock:
+                    if winner[0] is None:
+                        winner[0] = attempt
+                        for other in attempts:
+                            if other is not attempt:
+                                other.lose()
+                    elif winner[0] is not attempt:
+                        return
+                if on_delta:
+                    on_delta(delta)
+
+            call_kwargs = dict(kwargs, stream=stream, cancel=attempt.cancel)
+            if stream:
+                call_kwargs["on_delta"] = forward
+            attempt.future = self._pool.submit(self._call, attempt, messages, tools, **call_kwargs)
+            attempt.future.attempt = attempt
+            attempts.append(attempt)
+            return attempt
+
+        def hedge_wait(latest: _Attempt) -> Optional[float]:
+            """Seconds left before ``latest`` is hedged, ``None`` if it never is."""
+            if not backends or winner[0] is not None:
+                # Tokens already reached the user, a second stream would duplicate them
+                return None
+            deadline = self._hedge_deadline(latest.backend)
+            if deadline is None:
+                return None
+            return max(0.0, latest.launched_at + deadline - time.monotonic())
+
+        latest = launch()
+        pending = {latest.future}
+        response = None
+        won: Optional[_Attempt] = None
+        try:
+            while pending:
+                timeout = hedge_wait(latest)
+                if cancel is not None:
+                    timeout = CANCEL_POLL_SECONDS if timeout is None else min(timeout, CANCEL_POLL_SECONDS)
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                if cancel is not None and cancel.is_set():
+                    # The attempts return their cancelled (partial) responses shortly
+                    for attempt in attempts:
+                        attempt.cancel.set()
+
+                for future in done:
+                    response = future.result()
+                    with lock:
+                        first = winner[0]
+                    if first is future.attempt or (first is None and response.status):
+                        won = future.attempt
+                        return response
+
+                if not done:
+                    if hedge_wait(latest) == 0.0:
+                        # No response (or first token) by the deadline, race the next backend
+                        logger.info(f"Hedging slow call to {latest.backend.chat_model}")
+                        latest = launch()
+                        pending.add(latest.future)
+                    continue
+
+                with lock:
+                    first = winner[0]
+                if first is None and backends and not pending:
+                    # Failed before any token, fall over to the next backend
+                    logger.warning(f"LLM call to {latest.backend.chat_model} failed, trying the next backend")
+                    latest = launch()
+                    pending.add(latest.future)
+        finally:
+            # Stop the attempts that lost, they would only burn tokens and rate limit budget
+            caller_cancelled = cancel is not None and cancel.is_set()
+            for attempt in attempts:
+                if attempt is won or caller_cancelled:
+                    attempt.cancel.set()
+                else:
+                    attempt.lose()
+
+        return response
+
+
+class AsyncLLMRouter(LLMRouter):
+    """``LLMRouter`` for the async engine, completions are coroutines.
+
+    The routed call runs in a worker thread over the sync backends, with
+    ``on_delta`` called back on the event loop in order. Cancelling the
+    awaiting task cancels the call like setting ``cancel`` does.
+    """
+
+    async def chat_completions(
+        self,
+        messages: List[Dict],
+        tools: List[Dict] = [],
+        stream: bool = False,
+        on_delta: Callable[[LLMDelta], None] = None,
+        cancel: threading.Event = None,
+        **kwargs,
+    ) -> LLMResponse:
+        """Async variant of ``LLMRouter.chat_completions``."""
+        loop = asyncio.get_running_loop()
+        abandoned = threading.Event()
+
+        def forward(delta: LLMDelta):
+            loop.call_soon_threadsafe(on_delta, delta)
+
+        try:
+            return await asyncio.to_thread(
+                super().chat_completions,
+                messages,
+                tools,
+                stream=stream,
+                on_delta=forward if on_delta else None,
+                cancel=_AnyEvent(cancel, abandoned),
+                **kwargs,
+            )
+        except asyncio.CancelledError:
+            # The thread cannot be interrupted, stop its attempts instead
+            abandoned.set()
+            raise
+
+
+class _AnyEvent:
+    """Set once any of the given events is, only offers ``is_set``."""
+
+    def __init__(self, *events: Optional[threading.Event]):
+        self.events = [e for e in events if e is not None]
+
+    def is_set(self) -> bool:
+        return any(e.is_set() for e in self.events)
+
+
+class _Attempt:
+    """One backend call of a routed completion."""
+
+    def __init__(self, backend: BaseLLM):
+        self.backend = backend
+        self.cancel = threading.Event()
+        self.launched_at = time.monotonic()
+        self.future: Optional[Future] = None
+        # Cancelled because another attempt won, not by the caller
+        self.lost = False
+
+    def lose(self):
+        """Cancel the attempt because another one won the race."""
+        self.lost = True
+        self.cancel.set()
+
+
+def _build_backend(spec: dict) -> BaseLLM:
+    spec = dict(spec)
+    llm_type = spec.get("llm_type", "openai")
+    if llm_type == "openai":
+        return get_llm_client(OpenaiConfig(**spec))
+    if llm_type == "fake":
+        from core.fake_llm import FakeLLM, FakeLLMConfig
+
+        return FakeLLM(FakeLLMConfig(**spec))
+    raise ValueError(f"Unknown llm_type {llm_type!r} in LLM_ROUTER_BACKENDS")
+
+
+_router: Optional[LLMRouter] = None
+_router_spec: Optional[str] = None
+_router_lock = threading.Lock()
+
+
+def get_llm() -> BaseLLM:
+    """Return the LLM the engine should use.
+
+    With ``LLM_ROUTER_BACKENDS`` (a JSON list of backend configs, e.g.
+    ``[{"chat_model": "gpt-4o"}, {"api_base": "https://...", "chat_model": "gpt-4o"}]``)
+    a process-wide ``LLMRouter`` over them, else the default ``OpenAIClient``.
+    """
+    global _router, _router_spec
+    spec = os.getenv("LLM_ROUTER_BACKENDS", "").strip()
+    if not spec:
+        return get_llm_client()
+    with _router_lock:
+        if _router is None or spec != _router_spec:
+            _router = LLMRouter([_build_backend(b) for b in json.loads(spec)])
+            _router_spec = spec
+            logger.info(f"Routing LLM calls over {len(_router.backends)} backends")
+    return _router
+
+
+_async_router: Optional[AsyncLLMRouter] = None
+_async_router_spec: Optional[str] = None
+
+
+def get_async_llm() -> BaseLLM:
+    """Async variant of ``get_llm`` for the async engine.
+
+    With ``LLM_ROUTER_BACKENDS`` a process-wide ``AsyncLLMRouter`` over them,
+    else the default ``AsyncOpenAIClient``. Its backend stats are its own, the
+    sync router of ``get_llm`` keeps serving the sync calls (e.g. summaries).
+    """
+    global _async_router, _async_router_spec
+    spec = os.getenv("LLM_ROUTER_BACKENDS", "").strip()
+    if not spec:
+        return get_async_llm_client()
+    with _router_lock:
+        if _async_router is None or spec != _async_router_spec:
+            _async_router = AsyncLLMRouter([_build_backend(b) for b in json.loads(spec)])
+            _async_router_spec = spec
+            logger.info(f"Routing async LLM calls over {len(_async_router.backends)} backends")
+    return _async_router
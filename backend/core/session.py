@@ -1,11 +1,16 @@
 from enum import Enum
 from datetime import datetime
-from typing import Any, Optional, List, Union
+from typing import Any, Callable, Optional, List, Union
+import asyncio
+import copy
+import os
+import threading
 import uuid
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, PrivateAttr
 
 from database.db import SQLiteDB
+from database.writer import get_persister
 from core.enums import ToolStatus
 from flask_socketio import emit
 
@@ -27,6 +32,14 @@ class MsgType(str, Enum):
     output = "output"
 
 
+class ToolProgress(BaseModel):
+    """Latest progress reported by a running tool call (e.g. an MCP progress notification)."""
+
+    progress: float
+    total: Optional[float] = None
+    message: Optional[str] = None
+
+
 class ToolContent(BaseModel):
     model_config = ConfigDict(
         arbitrary_types_allowed=True,
@@ -39,6 +52,11 @@ class ToolContent(BaseModel):
     tool_args: dict
     tool_response: Any
     tool_status: ToolStatus
+    cached: bool = False
+    # Full output in the blob store when tool_response is only a preview
+    blob_ref: Optional[str] = None
+    # Set while the call runs and reports progress, cleared once it finishes
+    tool_progress: Optional[ToolProgress] = None
 
 class TextContent(BaseModel):
     type: str = "text"
@@ -74,12 +92,66 @@ class BaseMessage(BaseModel):
     )
 
 
+# Sends ``(event, data)`` to the client, see core.emitter
+Emitter = Callable[[str, dict], None]
+
+
+def _emit(emitter: Optional[Emitter], event: str, data: dict):
+    """Send through ``emitter`` if given, else through the Flask-SocketIO request context."""
+    if emitter is not None:
+        emitter(event, data)
+    else:
+        emit(event, data, namespace="/chat")
+
+
+# Version of the ``chat_patch`` protocol, see ``OutputMessage.publish``
+PATCH_PROTOCOL_VERSION = 1
+
+
+def _diff_item(old: dict, new: dict, index: int) -> Optional[dict]:
+    """Patch op turning content item ``old`` into ``new``, ``None`` if unchanged."""
+    if old == new:
+        return None
+    if (
+        old.get("type") == new.get("type") == "text"
+        and new.get("text", "").startswith(old.get("text", ""))
+    ):
+        return {"op": "text_delta", "index": index, "text": new["text"][len(old.get("text", "")):]}
+    changed = {k: v for k, v in new.items() if old.get(k) != v}
+    return {"op": "update", "index": index, "value": changed}
+
+
+def diff_message(old: dict, new: dict) -> Optional[List[dict]]:
+    """Patch ops turning message ``old`` into ``new``.
+
+    Returns ``None`` when no patch can express the change (content removed),
+    the caller then sends a full snapshot.
+    """
+    old_content, new_content = old.get("content", []), new.get("content", [])
+    if len(new_content) < len(old_content):
+        return None
+
+    ops = []
+    for key, value in new.items():
+        if key != "content" and old.get(key) != value:
+            ops.append({"op": "set", "key": key, "value": value})
+    for index, item in enumerate(new_content):
+        if index < len(old_content):
+            op = _diff_item(old_content[index], item, index)
+            if op:
+                ops.append(op)
+        else:
+            ops.append({"op": "append", "value": item})
+    return ops
+
+
 class InputMessage(BaseMessage):
     db: SQLiteDB
     msg_type: MsgType = MsgType.input
+    emitter: Optional[Emitter] = Field(default=None, exclude=True)
 
     def publish(self):
-        emit("chat", self.model_dump(exclude={"db"}), namespace="/chat")
+        _emit(self.emitter, "chat", self.model_dump(exclude={"db"}))
         self.db.add_or_update_msg_to_conv(**self.model_dump(exclude={"db"}))
 
 
@@ -87,14 +159,98 @@ class OutputMessage(BaseMessage):
     db: SQLiteDB = Field(exclude=True)
     msg_type: MsgType = MsgType.output
     status: MsgStatus = MsgStatus.progress
+    emitter: Optional[Emitter] = Field(default=None, exclude=True)
+    # Last state sent to the client and the sequence number of the last event
+    _sent: Optional[dict] = PrivateAttr(default=None)
+    _seq: int = PrivateAttr(default=-1)
+    _publish_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
 
     def update_status(self, status: MsgStatus):
         self.status = status
         self.publish()
 
+    async def aupdate_status(self, status: MsgStatus):
+        self.status = status
+        await self.apublish()
+
     def publish(self):
-        emit("chat", self.model_dump(), namespace="/chat")
-        self.db.add_or_update_msg_to_conv(**self.model_dump())
+        """Emit the changes since the last publish and persist the message.
+
+        The first publish sends the full message as a ``chat`` snapshot, later
+        ones only send ``chat_patch`` ops (see ``diff_message``) numbered by
+        ``seq`` so the client can detect a gap and ask for a ``resync``.
+
+        Intermediate ``progress`` states are coalesced by the write-behind
+        persister, terminal states are written synchronously.
+        """
+        message = self.model_dump()
+        with self._publish_lock:
+            self._send(message)
+        get_persister(self.db).save(message, sync=self.status != MsgStatus.progress)
+
+    async def apublish(self):
+        """Async variant of ``publish`` for the asyncio server, never blocks the loop.
+
+        Terminal states are written to the database in a worker thread.
+        Coalescing a ``progress`` state only queues it in memory, so it stays
+        on the loop.
+        """
+        message = self.model_dump()
+        with self._publish_lock:
+            self._send(message)
+        persister = get_persister(self.db)
+        if self.status == MsgStatus.progress:
+            persister.save(message)
+        else:
+            await asyncio.to_thread(persister.save, message, sync=True)
+
+    def publish_delta(self, index: int, text: str):
+        """Append ``text`` to the text content at ``index`` and emit only the delta.
+
+        Deltas are not persisted, the next ``publish()`` writes the full message.
+        """
+        self.content[index].text += text
+        with self._publish_lock:
+            if self._sent is not None and index < len(self._sent["content"]):
+                self._sent["content"][index]["text"] += text
+                self._emit_patch([{"op": "text_delta", "index": index, "text": text}])
+            else:
+                # The client does not have the item yet
+                self._send(self.model_dump())
+
+    def resync(self, emitter: Optional[Emitter] = None):
+        """Send the full message again, e.g. after the client missed a patch."""
+        with self._publish_lock:
+            self._sent = self.model_dump()
+            self._emit_snapshot(copy.deepcopy(self._sent), emitter)
+
+    def _send(self, message: dict):
+        """Emit ``message`` as a patch against the last sent state, or as a snapshot."""
+        ops = diff_message(self._sent, message) if self._sent is not None else None
+        if ops is None:
+            self._emit_snapshot(message)
+        elif ops:
+            self._emit_patch(ops)
+        self._sent = copy.deepcopy(message)
+
+    def _emit_snapshot(self, message: dict, emitter: Optional[Emitter] = None):
+        self._seq += 1
+        _emit(emitter or self.emitter, "chat", {**message, "seq": self._seq})
+
+    def _emit_patch(self, ops: List[dict]):
+        self._seq += 1
+        _emit(
+            self.emitter,
+            "chat_patch",
+            {
+                "v": PATCH_PROTOCOL_VERSION,
+                "session_id": self.session_id,
+                "conv_id": self.conv_id,
+                "msg_id": self.msg_id,
+                "seq": self._seq,
+                "ops": ops,
+            },
+        )
 
 
 class ContextMessage(BaseModel):
@@ -109,6 +265,8 @@ class ContextMessage(BaseModel):
     tool_calls: Optional[List[dict]] = None
     tool_call_id: Optional[str] = None
     role: RoleTypes = RoleTypes.system
+    # Cached token count, see core.context.message_tokens
+    _token_count: Optional[int] = PrivateAttr(default=None)
 
     def to_llm_msg(self):
         msg = {
@@ -144,33 +302,58 @@ class Session:
         db: SQLiteDB,
         session_id: str = "",
         conv_id: str = "",
+        emitter: Optional[Emitter] = None,
         **kwargs,
     ):
+        """
+        :param emitter: Sends events to the client, defaults to the Flask-SocketIO request context.
+        """
         self.db = db
         self.session_id = session_id
         self.conv_id = conv_id
         self.conversations = []
         self.reasoning_context = []
+        # Messages of reasoning_context already in the context log
+        self._context_saved = 0
         self.state = {}
         self.output_message = OutputMessage(
-            db=self.db, session_id=self.session_id, conv_id=self.conv_id, msg_id=str(uuid.uuid4())
+            db=self.db,
+            session_id=self.session_id,
+            conv_id=self.conv_id,
+            msg_id=str(uuid.uuid4()),
+            emitter=emitter,
         )
 
-        self.get_context_messages()
+        self.get_context_messages(tail=int(os.getenv("CONTEXT_LOAD_TAIL", "0")) or None)
 
     def save_context_messages(self):
-        context = {
-            "reasoning": [message.to_llm_msg() for message in self.reasoning_context],
-        }
-        self.db.add_or_update_context_msg(self.session_id, context)
+        """Append the context messages added since the last load / save to the context log."""
+        new_messages = self.reasoning_context[self._context_saved:]
+        if not new_messages:
+            return
+        self.db.append_context_log(
+            self.session_id,
+            [message.to_llm_msg() for message in new_messages],
+        )
+        self._context_saved = len(self.reasoning_context)
 
-    def get_context_messages(self):
+    def get_context_messages(self, tail: int = None):
+        """Load the reasoning context from the context log.
+
+        :param int tail: Only load the last ``tail`` messages (plus the system prompt).
+        """
         if not self.reasoning_context:
-            context = self.db.get_context_messages(self.session_id)
-            self.reasoning_context = [
-                ContextMessage.from_json(message)
-                for message in context.get("reasoning", [])
-            ]
+            rows = self.db.get_context_log(self.session_id, tail=tail)
+            if tail and rows and rows[0]["seq"] > 0:
+                # Tool results are only valid right after their tool call
+                while rows and rows[0]["message"].get("role") == RoleTypes.tool:
+                    rows.pop(0)
+                head = self.db.get_context_log(self.session_id, head=1)
+                if head and head[0]["message"].get("role") == RoleTypes.system:
+                    rows = head + rows
+
+            self.reasoning_context = [ContextMessage.from_json(row["message"]) for row in rows]
+            self._context_saved = len(self.reasoning_context)
 
         return self.reasoning_context
 
@@ -183,8 +366,19 @@ class Session:
         session["conversation"] = conversation
         return session
 
+    def get_page(self, limit: int = 50, **cursor):
+        """Session with the latest ``limit`` messages, ``cursor`` pages further back."""
+        session = self.db.get_session(self.session_id)
+        page = self.db.get_conversations_page(self.session_id, limit=limit, **cursor)
+        session["conversation"] = page["conversations"]
+        session["next_cursor"] = page["next_cursor"]
+        return session
+
     def get_all(self):
         return self.db.get_sessions()
 
+    def get_all_page(self, limit: int = 50, **cursor):
+        return self.db.get_sessions_page(limit=limit, **cursor)
+
     def delete(self):
         return self.db.delete_session(self.session_id)
@@ -1,27 +1,72 @@
 import json
+import random
 import sqlite3
 import time
 import logging
 import os
 
-from typing import List
+from contextlib import contextmanager
+from functools import wraps
+from typing import Iterator, List, Optional
 
 
 from .initialise import initialize_sqlite
+from .pool import get_pool
 
 logger = logging.getLogger(__name__)
 
 
+def _retry_on_locked(fn):
+    """Retry a write when another worker process holds the database lock.
+
+    ``busy_timeout`` already waits for the lock, this covers writers that still
+    lose the race (``database is locked`` / ``busy``) under several workers.
+    Retries are bounded by ``SQLITE_LOCK_RETRIES`` with jittered backoff.
+    """
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        retries = int(os.getenv("SQLITE_LOCK_RETRIES", "5"))
+        for attempt in range(retries + 1):
+            try:
+                return fn(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                message = str(e).lower()
+                if attempt == retries or ("locked" not in message and "busy" not in message):
+                    raise
+                delay = min(2.0, 0.05 * 2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning(f"{fn.__name__}: {e}, retrying in {delay:.2f}s")
+                time.sleep(delay)
+
+    return wrapper
+
+
 class SQLiteDB():
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, profile: str = None):
+        """
+        :param str db_path: Path of the SQLite file, ``SQLITE_DB_PATH`` by default.
+        :param str profile: Durability profile (see ``database.profiles``), ``SQLITE_PROFILE`` by default.
+        """
         self.db_path = db_path or os.getenv("SQLITE_DB_PATH", "blaze.db")
+        self.pool = get_pool(self.db_path, profile=profile)
 
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=True)
-        self.conn.row_factory = sqlite3.Row
-        self.cursor = self.conn.cursor()
-        initialize_sqlite(self.db_path)
-        logger.info("Connected to SQLite DB...")
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a pooled connection for a single operation.
 
+        Connections are never shared between greenlets, each operation holds
+        its own for the duration of the ``with`` block.
+        """
+        conn = self.pool.acquire()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.release(conn)
+
+    @_retry_on_locked
     def create_session(
         self,
         session_id: str,
@@ -40,19 +85,20 @@ class SQLiteDB():
         created_at = created_at or int(time.time())
         updated_at = updated_at or int(time.time())
 
-        self.cursor.execute(
-            """
-        INSERT OR IGNORE INTO sessions (session_id, created_at, updated_at, metadata)
-        VALUES (?, ?, ?, ?)
-        """,
-            (
-                session_id,
-                created_at,
-                updated_at,
-                json.dumps(metadata),
-            ),
-        )
-        self.conn.commit()
+        with self._connection() as conn:
+            conn.execute(
+                """
+            INSERT OR IGNORE INTO sessions (session_id, created_at, updated_at, metadata)
+            VALUES (?, ?, ?, ?)
+            """,
+                (
+                    session_id,
+                    created_at,
+                    updated_at,
+                    json.dumps(metadata),
+                ),
+            )
+            conn.commit()
 
     def get_session(self, session_id: str) -> dict:
         """Get a session by session_id.
@@ -61,10 +107,10 @@ class SQLiteDB():
         :return: Session data as a dictionary.
         :rtype: dict
         """
-        self.cursor.execute(
-            "SELECT * FROM sessions WHERE session_id = ?", (session_id,)
-        )
-        row = self.cursor.fetchone()
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
         if row is not None:
             session = dict(row)  # Convert sqlite3.Row to dictionary
             session["metadata"] = json.loads(session["metadata"])
@@ -79,13 +125,58 @@ class SQLiteDB():
         :return: List of all sessions.
         :rtype: list
         """
-        self.cursor.execute("SELECT * FROM sessions ORDER BY updated_at DESC")
-        row = self.cursor.fetchall()
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM sessions ORDER BY updated_at DESC").fetchall()
         sessions = [dict(r) for r in row]
         for s in sessions:
             s["metadata"] = json.loads(s["metadata"])
         return sessions
 
+    def get_sessions_page(
+        self,
+        limit: int = 50,
+        before_updated_at: Optional[int] = None,
+        before_session_id: Optional[str] = None,
+    ) -> dict:
+        """Get a page of sessions, most recently updated first.
+
+        Keyset paginated: pass the ``next_cursor`` of a page to get the next one.
+
+        :param int limit: Maximum number of sessions to return.
+        :param int before_updated_at: ``updated_at`` of the last session of the previous page.
+        :param str before_session_id: ``session_id`` of the last session of the previous page,
+            without it the page starts at sessions updated before ``before_updated_at``.
+        :return: ``{"sessions": [...], "next_cursor": {...} or None}``
+        :rtype: dict
+        """
+        query = "SELECT * FROM sessions"
+        params = []
+        if before_updated_at is not None and before_session_id is not None:
+            query += " WHERE (updated_at, session_id) < (?, ?)"
+            params += [before_updated_at, before_session_id]
+        elif before_updated_at is not None:
+            # No tie-breaker, skip the whole timestamp rather than part of it
+            query += " WHERE updated_at < ?"
+            params.append(before_updated_at)
+        query += " ORDER BY updated_at DESC, session_id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        sessions = [dict(r) for r in rows[:limit]]
+        for s in sessions:
+            s["metadata"] = json.loads(s["metadata"])
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = sessions[-1]
+            next_cursor = {
+                "before_updated_at": last["updated_at"],
+                "before_session_id": last["session_id"],
+            }
+        return {"sessions": sessions, "next_cursor": next_cursor}
+
     def add_or_update_msg_to_conv(
         self,
         session_id: str,
@@ -115,36 +206,64 @@ class SQLiteDB():
         :param int updated_at: Timestamp when the message was last updated.
         :param dict metadata: Additional metadata for the message.
         """
-        created_at = created_at or int(time.time())
-        updated_at = updated_at or int(time.time())
+        self.add_or_update_msgs_to_conv(
+            [
+                dict(
+                    session_id=session_id,
+                    conv_id=conv_id,
+                    msg_id=msg_id,
+                    msg_type=msg_type,
+                    tools=tools,
+                    actions=actions,
+                    content=content,
+                    status=status,
+                    created_at=created_at,
+                    updated_at=updated_at,
+                    metadata=metadata,
+                )
+            ]
+        )
 
-        self.cursor.execute(
-            """
-        INSERT OR REPLACE INTO conversations (session_id, conv_id, msg_id, msg_type, tools, actions, content, status, created_at, updated_at, metadata)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
+    @_retry_on_locked
+    def add_or_update_msgs_to_conv(self, messages: List[dict]) -> None:
+        """Add or update several messages in a single transaction.
+
+        :param list messages: Messages with the keyword arguments of ``add_or_update_msg_to_conv``.
+        """
+        now = int(time.time())
+        rows = [
             (
-                session_id,
-                conv_id,
-                msg_id,
-                msg_type,
-                json.dumps(tools),
-                json.dumps(actions),
-                json.dumps(content),
-                status,
-                created_at,
-                updated_at,
-                json.dumps(metadata),
-            ),
-        )
-        self.conn.commit()
+                message["session_id"],
+                message["conv_id"],
+                message["msg_id"],
+                message["msg_type"],
+                json.dumps(message["tools"]),
+                json.dumps(message["actions"]),
+                json.dumps(message["content"]),
+                message.get("status"),
+                message.get("created_at") or now,
+                message.get("updated_at") or now,
+                json.dumps(message.get("metadata") or {}),
+            )
+            for message in messages
+        ]
+
+        with self._connection() as conn:
+            conn.executemany(
+                """
+            INSERT OR REPLACE INTO conversations (session_id, conv_id, msg_id, msg_type, tools, actions, content, status, created_at, updated_at, metadata)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                rows,
+            )
+            conn.commit()
 
     def get_conversations(self, session_id: str) -> list:
-        self.cursor.execute(
-            "SELECT * FROM conversations WHERE session_id = ? ORDER BY created_at ASC",
-            (session_id,),
-        )
-        rows = self.cursor.fetchall()
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM conversations WHERE session_id = ? ORDER BY created_at ASC",
+                (session_id,),
+            ).fetchall()
         conversations = []
         for row in rows:
             if row is not None:
@@ -156,6 +275,71 @@ class SQLiteDB():
                 conversations.append(conv_dict)
         return conversations
 
+    def get_conversation(self, session_id: str, msg_id: str) -> Optional[dict]:
+        """Return one message of a session, ``None`` if it does not exist."""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM conversations WHERE session_id = ? AND msg_id = ?",
+                (session_id, msg_id),
+            ).fetchone()
+        if row is None:
+            return None
+        conv_dict = dict(row)
+        for key in ("tools", "actions", "content", "metadata"):
+            conv_dict[key] = json.loads(conv_dict[key])
+        return conv_dict
+
+    def get_conversations_page(
+        self,
+        session_id: str,
+        limit: int = 50,
+        before_created_at: Optional[int] = None,
+        before_msg_id: Optional[str] = None,
+    ) -> dict:
+        """Get the latest messages of a session, older pages through the cursor.
+
+        Messages within a page are in chronological order.
+
+        :param str session_id: Unique session ID.
+        :param int limit: Maximum number of messages to return.
+        :param int before_created_at: ``created_at`` of the oldest message of the previous page.
+        :param str before_msg_id: ``msg_id`` of the oldest message of the previous page,
+            without it the page starts at messages created before ``before_created_at``.
+        :return: ``{"conversations": [...], "next_cursor": {...} or None}``
+        :rtype: dict
+        """
+        query = "SELECT * FROM conversations WHERE session_id = ?"
+        params = [session_id]
+        if before_created_at is not None and before_msg_id is not None:
+            query += " AND (created_at, msg_id) < (?, ?)"
+            params += [before_created_at, before_msg_id]
+        elif before_created_at is not None:
+            query += " AND created_at < ?"
+            params.append(before_created_at)
+        query += " ORDER BY created_at DESC, msg_id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        conversations = []
+        for row in reversed(rows[:limit]):
+            conv_dict = dict(row)
+            conv_dict["tools"] = json.loads(conv_dict["tools"])
+            conv_dict["actions"] = json.loads(conv_dict["actions"])
+            conv_dict["content"] = json.loads(conv_dict["content"])
+            conv_dict["metadata"] = json.loads(conv_dict["metadata"])
+            conversations.append(conv_dict)
+
+        next_cursor = None
+        if len(rows) > limit:
+            oldest = conversations[0]
+            next_cursor = {
+                "before_created_at": oldest["created_at"],
+                "before_msg_id": oldest["msg_id"],
+            }
+        return {"conversations": conversations, "next_cursor": next_cursor}
+
     def get_context_messages(self, session_id: str) -> list:
         """Get context messages for a session.
 
@@ -163,13 +347,14 @@ class SQLiteDB():
         :return: List of context messages.
         :rtype: list
         """
-        self.cursor.execute(
-            "SELECT context_data FROM context_messages WHERE session_id = ?",
-            (session_id,),
-        )
-        result = self.cursor.fetchone()
+        with self._connection() as conn:
+            result = conn.execute(
+                "SELECT context_data FROM context_messages WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
         return json.loads(result[0]) if result else {}
 
+    @_retry_on_locked
     def add_or_update_context_msg(
         self,
         session_id: str,
@@ -190,45 +375,167 @@ class SQLiteDB():
         created_at = created_at or int(time.time())
         updated_at = updated_at or int(time.time())
 
-        self.cursor.execute(
-            """
-        INSERT OR REPLACE INTO context_messages (context_data, session_id, created_at, updated_at, metadata)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-            (
-                json.dumps(context_messages),
-                session_id,
-                created_at,
-                updated_at,
-                json.dumps(metadata),
-            ),
-        )
-        self.conn.commit()
+        with self._connection() as conn:
+            conn.execute(
+                """
+            INSERT OR REPLACE INTO context_messages (context_data, session_id, created_at, updated_at, metadata)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+                (
+                    json.dumps(context_messages),
+                    session_id,
+                    created_at,
+                    updated_at,
+                    json.dumps(metadata),
+                ),
+            )
+            conn.commit()
+
+    @_retry_on_locked
+    def append_context_log(self, session_id: str, messages: List[dict]) -> int:
+        """Append context messages to the end of a session's context log.
+
+        The sequence numbers are taken under the write lock, so overlapping
+        runs of one session append after each other instead of colliding.
+
+        :param str session_id: Unique session ID.
+        :param list messages: Context messages in LLM format.
+        :return: Sequence number of the first appended message.
+        :rtype: int
+        """
+        now = int(time.time())
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            start_seq = conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM context_log WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO context_log (session_id, seq, message, created_at) VALUES (?, ?, ?, ?)",
+                [
+                    (session_id, start_seq + i, json.dumps(message), now)
+                    for i, message in enumerate(messages)
+                ],
+            )
+            conn.commit()
+        return start_seq
+
+    def get_context_log(
+        self, session_id: str, tail: Optional[int] = None, head: Optional[int] = None
+    ) -> List[dict]:
+        """Get a session's context log in sequence order.
 
+        :param str session_id: Unique session ID.
+        :param int tail: Only return the last ``tail`` messages.
+        :param int head: Only return the first ``head`` messages.
+        :return: List of ``{"seq": int, "message": dict}``.
+        :rtype: list
+        """
+        if tail is not None:
+            query = "SELECT seq, message FROM context_log WHERE session_id = ? ORDER BY seq DESC LIMIT ?"
+            params = (session_id, tail)
+        elif head is not None:
+            query = "SELECT seq, message FROM context_log WHERE session_id = ? ORDER BY seq ASC LIMIT ?"
+            params = (session_id, head)
+        else:
+            query = "SELECT seq, message FROM context_log WHERE session_id = ? ORDER BY seq ASC"
+            params = (session_id,)
+
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        if tail is not None:
+            rows = reversed(rows)
+        return [{"seq": row["seq"], "message": json.loads(row["message"])} for row in rows]
+
+    def get_cache_entry(self, cache_key: str):
+        """Get a cached response, expired entries are deleted and count as a miss.
+
+        :param str cache_key: Cache key.
+        :return: The cached value or None.
+        """
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+            if row is None:
+                return None
+            if row["expires_at"] < time.time():
+                conn.execute("DELETE FROM response_cache WHERE cache_key = ?", (cache_key,))
+                conn.commit()
+                return None
+        return json.loads(row["value"])
+
+    @_retry_on_locked
+    def set_cache_entry(self, cache_key: str, value, expires_at: float) -> None:
+        """Store a cached response.
+
+        :param str cache_key: Cache key.
+        :param value: JSON serialisable value.
+        :param float expires_at: Unix time after which the entry is stale.
+        """
+        with self._connection() as conn:
+            conn.execute(
+                """
+            INSERT OR REPLACE INTO response_cache (cache_key, value, expires_at, created_at)
+            VALUES (?, ?, ?, ?)
+            """,
+                (cache_key, json.dumps(value, default=str), expires_at, int(time.time())),
+            )
+            conn.commit()
+
+    @_retry_on_locked
+    def put_blob(self, blob_id: str, data: bytes) -> None:
+        """Store a blob, a blob with the same id (content hash) is kept as is.
+
+        :param str blob_id: Content hash of ``data``.
+        :param bytes data: Blob content.
+        """
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO blobs (blob_id, data, size, created_at) VALUES (?, ?, ?, ?)",
+                (blob_id, data, len(data), int(time.time())),
+            )
+            conn.commit()
+
+    def get_blob(self, blob_id: str) -> Optional[bytes]:
+        """Return a blob's content, ``None`` if it does not exist."""
+        with self._connection() as conn:
+            row = conn.execute("SELECT data FROM blobs WHERE blob_id = ?", (blob_id,)).fetchone()
+        return row["data"] if row is not None else None
+
+    @_retry_on_locked
     def delete_conversation(self, session_id: str) -> bool:
         """Delete all conversations for a given session.
 
         :param str session_id: Unique session ID.
         :return: True if conversations were deleted, False otherwise.
         """
-        self.cursor.execute(
-            "DELETE FROM conversations WHERE session_id = ?", (session_id,)
-        )
-        self.conn.commit()
-        return self.cursor.rowcount > 0
-
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM conversations WHERE session_id = ?", (session_id,)
+            )
+            conn.commit()
+        return cursor.rowcount > 0
+
+    @_retry_on_locked
     def delete_context(self, session_id: str) -> bool:
         """Delete context messages for a given session.
 
         :param str session_id: Unique session ID.
         :return: True if context messages were deleted, False otherwise.
         """
-        self.cursor.execute(
-            "DELETE FROM context_messages WHERE session_id = ?", (session_id,)
-        )
-        self.conn.commit()
-        return self.cursor.rowcount > 0
-
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM context_messages WHERE session_id = ?", (session_id,)
+            )
+            log_cursor = conn.execute(
+                "DELETE FROM context_log WHERE session_id = ?", (session_id,)
+            )
+            conn.commit()
+        return cursor.rowcount > 0 or log_cursor.rowcount > 0
+
+    @_retry_on_locked
     def delete_session(self, session_id: str) -> bool:
         """Delete a session and all its associated data.
 
@@ -240,9 +547,10 @@ class SQLiteDB():
             failed_components.append("conversation")
         if not self.delete_context(session_id):
             failed_components.append("context")
-        self.cursor.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
-        self.conn.commit()
-        if not self.cursor.rowcount > 0:
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            conn.commit()
+        if not cursor.rowcount > 0:
             failed_components.append("session")
         success = len(failed_components) < 3
         return success, failed_components
@@ -254,18 +562,15 @@ class SQLiteDB():
                 SELECT COUNT(name)
                 FROM sqlite_master
                 WHERE type='table'
-                AND name IN ('sessions', 'conversations', 'context_messages');
+                AND name IN ('sessions', 'conversations', 'context_messages', 'context_log', 'blobs');
             """
-            self.cursor.execute(query)
-            table_count = self.cursor.fetchone()[0]
-            if table_count < 3:
+            with self._connection() as conn:
+                table_count = conn.execute(query).fetchone()[0]
+            if table_count < 5:
                 logger.info("Tables not found. Initializing SQLite DB...")
                 initialize_sqlite(self.db_path)
             return True
 
         except Exception as e:
             logger.exception(f"SQLite health check failed: {e}")
-            return False
-
-    def __del__(self):
-        self.conn.close()
\ No newline at end of file
+            return False
\ No newline at end of file
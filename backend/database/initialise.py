@@ -38,10 +38,92 @@ CREATE TABLE IF NOT EXISTS context_messages (
 )
 """
 
+# Schema migrations, applied in order on top of the tables above. Migration
+# ``n`` (1-based) is recorded in ``PRAGMA user_version`` once applied, so
+# append new migrations and never edit applied ones.
+MIGRATIONS = [
+    # 1: history loads filter on session_id ordered by created_at, the sidebar
+    # orders sessions by updated_at. msg_id / session_id break ties for keyset
+    # pagination.
+    [
+        """
+        CREATE INDEX IF NOT EXISTS idx_conversations_session_created
+        ON conversations (session_id, created_at, msg_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_sessions_updated
+        ON sessions (updated_at, session_id)
+        """,
+    ],
+    # 2: append-only reasoning context, one row per message, seeded from the
+    # legacy context_messages blobs
+    [
+        """
+        CREATE TABLE IF NOT EXISTS context_log (
+            session_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            message JSON,
+            created_at INTEGER,
+            PRIMARY KEY (session_id, seq)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT OR IGNORE INTO context_log (session_id, seq, message, created_at)
+        SELECT cm.session_id, CAST(j.key AS INTEGER), j.value, cm.updated_at
+        FROM context_messages cm, json_each(cm.context_data, '$.reasoning') j
+        """,
+    ],
+    # 3: persistent response cache for LLM and tool calls
+    [
+        """
+        CREATE TABLE IF NOT EXISTS response_cache (
+            cache_key TEXT PRIMARY KEY,
+            value JSON,
+            expires_at REAL,
+            created_at INTEGER
+        ) WITHOUT ROWID
+        """,
+    ],
+    # 4: content-addressed store for large tool results
+    [
+        """
+        CREATE TABLE IF NOT EXISTS blobs (
+            blob_id TEXT PRIMARY KEY,
+            data BLOB,
+            size INTEGER,
+            created_at INTEGER
+        )
+        """,
+    ],
+]
+
+
+def migrate_sqlite(conn: sqlite3.Connection):
+    """Apply the migrations newer than the database's ``user_version``.
+
+    Each migration runs in an immediate (write-locked) transaction and the
+    version is re-read under the lock, so workers starting at the same time
+    apply every migration exactly once.
+    """
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= len(MIGRATIONS):
+            conn.commit()
+            return
+        try:
+            for statement in MIGRATIONS[version]:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
 
 def initialize_sqlite(db_name="blaze.db"):
     """Initialize the SQLite database by creating the necessary tables."""
-    conn = sqlite3.connect(db_name)
+    conn = sqlite3.connect(db_name, timeout=30)
     cursor = conn.cursor()
 
     cursor.execute(CREATE_SESSIONS_TABLE)
@@ -49,6 +131,7 @@ def initialize_sqlite(db_name="blaze.db"):
     cursor.execute(CREATE_CONTEXT_MESSAGES_TABLE)
 
     conn.commit()
+    migrate_sqlite(conn)
     conn.close()
 
 
@@ -3,14 +3,19 @@ import threading
 import queue
 import os
 import logging
+from typing import Dict
+
+from .initialise import initialize_sqlite
+from .profiles import apply_profile, get_profile_name
 
 logger = logging.getLogger(__name__)
 
 
 class SQLiteConnectionPool:
-    def __init__(self, db_path: str = None, pool_size: int = 5):
-        self.db_path = db_path or os.getenv("SQLITE_DB_PATH", "director.db")
+    def __init__(self, db_path: str = None, pool_size: int = 5, profile: str = None):
+        self.db_path = db_path or os.getenv("SQLITE_DB_PATH", "blaze.db")
         self.pool_size = pool_size
+        self.profile = get_profile_name(profile)
         self._pool = queue.Queue(maxsize=pool_size)
         self._lock = threading.Lock()
 
@@ -18,13 +23,14 @@ class SQLiteConnectionPool:
         for _ in range(pool_size):
             conn = sqlite3.connect(self.db_path, check_same_thread=False)
             conn.row_factory = sqlite3.Row
+            apply_profile(conn, self.profile)
             self._pool.put(conn)
 
-        logger.info(f"Initialized SQLite pool with {pool_size} connections.")
+        logger.info(f"Initialized SQLite pool with {pool_size} connections ({self.profile} profile).")
 
-    def acquire(self):
-        """Get a connection from the pool."""
-        conn = self._pool.get()
+    def acquire(self, timeout: float = None):
+        """Get a connection from the pool, waiting up to ``timeout`` seconds."""
+        conn = self._pool.get(timeout=timeout)
         return conn
 
     def release(self, conn):
@@ -36,3 +42,25 @@ class SQLiteConnectionPool:
         while not self._pool.empty():
             conn = self._pool.get_nowait()
             conn.close()
+
+
+_pools: Dict[str, SQLiteConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, profile: str = None) -> SQLiteConnectionPool:
+    """Return the process-wide pool for ``db_path``.
+
+    The schema is initialised once, when the pool for a path is first created.
+    ``profile`` only applies to that first creation.
+    """
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            initialize_sqlite(db_path)
+            pool = _pools[db_path] = SQLiteConnectionPool(
+                db_path,
+                pool_size=int(os.getenv("SQLITE_POOL_SIZE", "5")),
+                profile=profile,
+            )
+    return pool
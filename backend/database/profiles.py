@@ -0,0 +1,54 @@
+import os
+import sqlite3
+
+# Pragmas applied to every pooled connection. ``busy_timeout`` goes first so
+# switching the journal mode waits for other writers instead of failing.
+PROFILES = {
+    # Rollback journal with an fsync per commit, SQLite's defaults.
+    "legacy": {
+        "busy_timeout": 5000,
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+    },
+    # WAL with an fsync per commit, no committed data is lost on power failure.
+    "durable": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+    },
+    # WAL, fsync only at checkpoints. Survives app crashes, a power failure may
+    # lose the last few commits.
+    "balanced": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+    },
+    # No fsyncs at all, for local development and throwaway databases.
+    "fast": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile_name(profile: str = None) -> str:
+    return profile or os.getenv("SQLITE_PROFILE", DEFAULT_PROFILE)
+
+
+def apply_profile(conn: sqlite3.Connection, profile: str = None):
+    """Apply the pragmas of ``profile`` (``SQLITE_PROFILE`` by default) to ``conn``."""
+    name = get_profile_name(profile)
+    if name not in PROFILES:
+        raise ValueError(f"Unknown SQLite profile {name!r}, expected one of {list(PROFILES)}")
+
+    for pragma, value in PROFILES[name].items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
@@ -0,0 +1,113 @@
+import atexit
+import logging
+import os
+import threading
+from typing import Dict
+
+from .db import SQLiteDB
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindPersister:
+    """Coalesces intermediate message states and writes them in batches.
+
+    Only the latest pending state per ``msg_id`` is kept. Pending states are
+    flushed in one transaction every ``interval`` seconds. Synchronous saves
+    (terminal states) drop the pending state of their message and are written
+    immediately, after any flush already in progress.
+    """
+
+    def __init__(self, db: SQLiteDB, interval: float = None):
+        """
+        :param SQLiteDB db: Database to write to.
+        :param float interval: Seconds between flushes of pending states.
+        """
+        self.db = db
+        self.interval = interval or float(os.getenv("SQLITE_FLUSH_INTERVAL", "0.5"))
+        self._pending: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        # Serialises flushes and synchronous writes so a terminal state is never
+        # overwritten by an older batched one
+        self._write_lock = threading.Lock()
+        self._thread: threading.Thread = None
+        self._stop = threading.Event()
+
+    def save(self, message: dict, sync: bool = False):
+        """Persist ``message`` (``add_or_update_msg_to_conv`` kwargs).
+
+        :param dict message: Message to persist.
+        :param bool sync: Write immediately instead of coalescing.
+        """
+        if sync:
+            with self._write_lock:
+                with self._lock:
+                    self._pending.pop(message["msg_id"], None)
+                self.db.add_or_update_msg_to_conv(**message)
+            return
+
+        with self._lock:
+            self._pending[message["msg_id"]] = message
+        self._ensure_started()
+
+    def flush(self):
+        """Write all pending states in a single transaction."""
+        with self._write_lock:
+            with self._lock:
+                batch = list(self._pending.values())
+                self._pending = {}
+            if not batch:
+                return
+            try:
+                self.db.add_or_update_msgs_to_conv(batch)
+            except Exception:
+                # Put the batch back for the next tick, unless a newer state arrived meanwhile
+                with self._lock:
+                    for message in batch:
+                        self._pending.setdefault(message["msg_id"], message)
+                raise
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="blaze-write-behind", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception(f"Write-behind flush failed: {e}")
+
+
+_persisters: Dict[str, WriteBehindPersister] = {}
+_persisters_lock = threading.Lock()
+
+
+def get_persister(db: SQLiteDB) -> WriteBehindPersister:
+    """Return the process-wide persister for ``db``'s database file."""
+    with _persisters_lock:
+        persister = _persisters.get(db.db_path)
+        if persister is None:
+            persister = _persisters[db.db_path] = WriteBehindPersister(db)
+    return persister
+
+
+@atexit.register
+def flush_persisters():
+    with _persisters_lock:
+        persisters = list(_persisters.values())
+    for persister in persisters:
+        try:
+            persister.close()
+        except Exception:
+            logger.exception("Failed to flush pending messages on exit")
@@ -1,11 +1,16 @@
 import os
 import logging
-from flask import Flask
+from flask import Flask, jsonify, request
 from flask_socketio import SocketIO, Namespace
 from database.db import SQLiteDB
 # Removed invalid import - set_emitter doesn't exist
-from core.reasoning import ReasoningEngine
+from core.reasoning import ReasoningEngine, resync_message, stop_engines
 from core.session import Session, InputMessage, MsgStatus
+from core.message_queue import get_client_manager
+from core.emitter import SocketIOEmitter
+from core.jobs import JobQueueFull, get_dispatcher
+from core import blobs
+from core.procpool import get_tool_pool
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
@@ -16,7 +21,17 @@ load_dotenv()
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev")
 
-socketio = SocketIO(app, async_mode="eventlet", cors_allowed_origins="*")
+# With SOCKETIO_MESSAGE_QUEUE set, events are routed between workers through the queue
+socketio = SocketIO(
+    app,
+    async_mode="eventlet",
+    cors_allowed_origins="*",
+    client_manager=get_client_manager(),
+)
+
+# Shared DB handle, the schema is initialised once here and connections are
+# checked out of the pool per operation
+db = SQLiteDB()
 
 
 class ChatNamespace(Namespace):
@@ -32,37 +47,85 @@ class ChatNamespace(Namespace):
         logger.info(f"[/chat] client disconnected")
 
     def on_chat(self, message: dict):
+        """Queue the message, the reasoning runs on the job dispatcher."""
         logger.info(f"[/chat] on_chat: {message}")
-
-        db = SQLiteDB()
+        emitter = SocketIOEmitter(socketio, request.sid, namespace=self.namespace)
 
         try:
-            sess = Session(db=db, **message)
-            sess.create()
-
-            inp = InputMessage(db=db, **message)
-            inp.publish()
-        except Exception as e:
-            logger.exception("Failed to initialize session/input message")
-            socketio.emit("chat", {"error": f"Init error: {e}"}, namespace="/chat")
-            return
-
+            get_dispatcher().submit(message.get("session_id", ""), run_chat, message, emitter)
+        except JobQueueFull as e:
+            logger.warning(f"[/chat] rejected message: {e}")
+            emitter("chat", {"error": "Server is busy, please retry shortly."})
+
+    def on_stop(self, message: dict):
+        """Stop generating for a session: drop its queued messages and cancel running engines."""
+        session_id = message.get("session_id", "")
+        dropped = get_dispatcher().cancel(session_id, on_drop=drop_chat)
+        stopped = stop_engines(session_id, msg_id=message.get("msg_id"))
+        logger.info(f"[/chat] stop {session_id}: {stopped} running, {dropped} queued")
+
+    def on_resync(self, message: dict):
+        """Send a full snapshot of a message the client lost track of (missed ``chat_patch``)."""
+        emitter = SocketIOEmitter(socketio, request.sid, namespace=self.namespace)
+        resync_message(db, message.get("session_id", ""), message.get("msg_id", ""), emitter)
+
+    def on_fetch_blob(self, message: dict):
+        """Acknowledge with the full tool output behind a ``blob_ref``."""
+        blob_ref = message.get("blob_ref", "")
+        return {"blob_ref": blob_ref, "data": blobs.load(db, blob_ref)}
+
+
+def run_chat(message: dict, emitter: SocketIOEmitter):
+    """Job: persist the input message and run the reasoning engine for it."""
+    try:
+        sess = Session(db=db, emitter=emitter, **message)
+        sess.create()
+
+        inp = InputMessage(db=db, emitter=emitter, **message)
+        inp.publish()
+    except Exception as e:
+        logger.exception("Failed to initialize session/input message")
+        emitter("chat", {"error": f"Init error: {e}"})
+        return
+
+    try:
+        system_prompt = message.get("system_prompt", "You are a helpful assistant.")
+        engine = ReasoningEngine(
+            system_prompt=system_prompt,
+            input_message=inp,
+            session=sess,
+        )
+
+        engine.run()
+    except Exception as e:
+        logger.exception("Error creating ReasoningEngine")
         try:
-            system_prompt = message.get("system_prompt", "You are a helpful assistant.")
-            engine = ReasoningEngine(
-                system_prompt=system_prompt,
-                input_message=inp,
-                session=sess,
-            )
-
-            engine.run()
-        except Exception as e:
-            logger.exception("Error creating ReasoningEngine")
-            try:
-                sess.output_message.update_status(MsgStatus.error)
-            except Exception:
-                pass
-            socketio.emit("chat", {"error": str(e)}, namespace="/chat")
+            sess.output_message.update_status(MsgStatus.error)
+        except Exception:
+            pass
+        emitter("chat", {"error": str(e)})
+
+
+def drop_chat(message: dict, emitter: SocketIOEmitter):
+    """Settle a queued message that was cancelled before it ran.
+
+    Its input was never published, so it is published here as an error,
+    otherwise the user's message would silently vanish.
+    """
+    try:
+        sess = Session(db=db, emitter=emitter, **message)
+        sess.create()
+        inp = InputMessage(db=db, emitter=emitter, **{**message, "status": MsgStatus.error})
+        inp.publish()
+    except Exception as e:
+        logger.exception("Failed to publish a cancelled input message")
+        emitter("chat", {"error": f"Message cancelled before it was processed: {e}"})
+
+
+@app.route("/metrics")
+def metrics():
+    """Job queue depth, tool process pool and counters of this worker."""
+    return jsonify(jobs=get_dispatcher().metrics(), tool_pool=get_tool_pool().metrics())
 
 
 socketio.on_namespace(ChatNamespace("/chat"))
@@ -0,0 +1,9 @@
+import pytest
+
+from database.db import SQLiteDB
+
+
+@pytest.fixture
+def db(tmp_path) -> SQLiteDB:
+    """Fresh database file per test, pools are process-wide per path."""
+    return SQLiteDB(db_path=str(tmp_path / "test.db"))
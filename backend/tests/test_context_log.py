@@ -0,0 +1,14 @@
+from core.session import ContextMessage, RoleTypes, Session
+
+
+def test_overlapping_runs_of_a_session_append_after_each_other(db):
+    first = Session(db=db, session_id="s")
+    second = Session(db=db, session_id="s")
+    first.reasoning_context.append(ContextMessage(role=RoleTypes.user, content="one"))
+    second.reasoning_context.append(ContextMessage(role=RoleTypes.user, content="two"))
+
+    first.save_context_messages()
+    second.save_context_messages()
+
+    rows = db.get_context_log("s")
+    assert [(row["seq"], row["message"]["content"]) for row in rows] == [(0, "one"), (1, "two")]
@@ -0,0 +1,39 @@
+def add_sessions(db, updated_at: dict):
+    for session_id, ts in updated_at.items():
+        db.create_session(session_id, created_at=ts, updated_at=ts)
+
+
+def test_sessions_page_through_ties(db):
+    add_sessions(db, {"a": 100, "b": 200, "c": 200, "d": 200, "e": 300})
+
+    seen = []
+    cursor = {}
+    while True:
+        page = db.get_sessions_page(limit=2, **cursor)
+        seen += [s["session_id"] for s in page["sessions"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == ["e", "d", "c", "b", "a"]
+
+
+def test_sessions_cursor_without_id_keeps_ties_of_older_timestamps(db):
+    add_sessions(db, {"a": 100, "b": 100, "c": 200, "d": 200})
+
+    page = db.get_sessions_page(limit=10, before_updated_at=200)
+
+    assert [s["session_id"] for s in page["sessions"]] == ["b", "a"]
+
+
+def test_conversations_cursor_without_id_keeps_ties_of_older_timestamps(db):
+    db.create_session("s")
+    for msg_id, ts in {"m1": 100, "m2": 100, "m3": 200}.items():
+        db.add_or_update_msg_to_conv(
+            session_id="s", conv_id="c", msg_id=msg_id, msg_type="input",
+            tools=[], actions=[], content=[], created_at=ts,
+        )
+
+    page = db.get_conversations_page("s", limit=10, before_created_at=200)
+
+    assert [m["msg_id"] for m in page["conversations"]] == ["m1", "m2"]
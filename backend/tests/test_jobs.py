@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from core.jobs import JobDispatcher, JobQueueFull
+
+
+def test_jobs_of_one_key_run_in_order():
+    dispatcher = JobDispatcher(max_workers=4, max_queue=100)
+    ran = []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def job(key, i):
+        time.sleep(0.01)
+        with lock:
+            ran.append((key, i))
+            if len(ran) == 20:
+                done.set()
+
+    for i in range(10):
+        dispatcher.submit("a", job, "a", i)
+        dispatcher.submit("b", job, "b", i)
+
+    assert done.wait(5)
+    assert [i for key, i in ran if key == "a"] == list(range(10))
+    assert [i for key, i in ran if key == "b"] == list(range(10))
+    dispatcher.close()
+
+
+def test_jobs_of_one_key_never_overlap():
+    dispatcher = JobDispatcher(max_workers=4, max_queue=100)
+    running = []
+    overlaps = []
+    done = threading.Event()
+
+    def job(i):
+        running.append(i)
+        if len(running) > 1:
+            overlaps.append(list(running))
+        time.sleep(0.01)
+        running.remove(i)
+        if i == 4:
+            done.set()
+
+    for i in range(5):
+        dispatcher.submit("session", job, i)
+
+    assert done.wait(5)
+    assert overlaps == []
+    dispatcher.close()
+
+
+def test_submit_rejects_when_the_queue_is_full():
+    dispatcher = JobDispatcher(max_workers=1, max_queue=2)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    dispatcher.submit("a", blocker)
+    assert started.wait(5)
+    dispatcher.submit("a", lambda: None)
+    dispatcher.submit("b", lambda: None)
+
+    with pytest.raises(JobQueueFull):
+        dispatcher.submit("c", lambda: None)
+    assert dispatcher.metrics()["rejected"] == 1
+
+    release.set()
+    dispatcher.close()
+
+
+def test_cancel_drops_queued_jobs_and_reports_them():
+    dispatcher = JobDispatcher(max_workers=1, max_queue=10)
+    release = threading.Event()
+    started = threading.Event()
+    ran = []
+
+    def blocker(msg_id):
+        started.set()
+        release.wait(5)
+
+    dispatcher.submit("a", blocker, "m0")
+    assert started.wait(5)
+    for i in range(1, 4):
+        dispatcher.submit("a", ran.append, f"m{i}")
+
+    dropped = []
+    assert dispatcher.cancel("a", on_drop=dropped.append) == 3
+    assert dropped == ["m1", "m2", "m3"]
+
+    release.set()
+    dispatcher.close()
+    for worker in dispatcher._workers:
+        worker.join(5)
+    assert ran == []
+    assert dispatcher.metrics()["queue_depth"] == 0
@@ -0,0 +1,51 @@
+import json
+import queue
+import threading
+
+import pytest
+
+from core.message_queue import get_async_client_manager, get_client_manager
+
+
+def test_no_queue_keeps_the_in_process_manager(monkeypatch):
+    monkeypatch.delenv("SOCKETIO_MESSAGE_QUEUE", raising=False)
+    assert get_client_manager() is None
+    assert get_async_client_manager() is None
+
+
+def test_async_server_rejects_unsupported_queues():
+    with pytest.raises(ValueError):
+        get_async_client_manager("memory://")
+
+
+@pytest.mark.parametrize("url", ["memory://", "filesystem://"])
+def test_events_reach_the_other_workers(url, tmp_path, monkeypatch):
+    pytest.importorskip("kombu")
+    monkeypatch.setenv("SOCKETIO_QUEUE_FOLDER", str(tmp_path / "queue"))
+    # A worker listening on the queue, and a background process that only emits
+    listener = get_client_manager(url)
+    emitter = get_client_manager(url, write_only=True)
+    received = queue.Queue()
+
+    def listen():
+        for payload in listener._listen():
+            received.put(payload)
+
+    threading.Thread(target=listen, daemon=True).start()
+
+    # The listener binds its queue asynchronously, emit until it gets one
+    for _ in range(50):
+        emitter.emit("chat", {"text": "hi"}, namespace="/chat", room="sid-1")
+        try:
+            payload = received.get(timeout=0.1)
+            break
+        except queue.Empty:
+            continue
+    else:
+        pytest.fail(f"No event routed through {url}")
+
+    if isinstance(payload, (str, bytes)):
+        payload = json.loads(payload)
+    assert payload["event"] == "chat"
+    assert payload["data"] == [{"text": "hi"}]
+    assert payload["room"] == "sid-1"
@@ -0,0 +1,77 @@
+import json
+import sqlite3
+
+from core.session import Session
+from database.db import SQLiteDB
+from database.initialise import (
+    CREATE_CONTEXT_MESSAGES_TABLE,
+    CREATE_CONVERSATIONS_TABLE,
+    CREATE_SESSIONS_TABLE,
+    MIGRATIONS,
+    initialize_sqlite,
+    migrate_sqlite,
+)
+
+
+def legacy_db(path) -> str:
+    """Database as written before the migrations existed (``user_version`` 0)."""
+    conn = sqlite3.connect(path)
+    conn.execute(CREATE_SESSIONS_TABLE)
+    conn.execute(CREATE_CONVERSATIONS_TABLE)
+    conn.execute(CREATE_CONTEXT_MESSAGES_TABLE)
+    reasoning = [
+        {"role": "system", "content": "be nice"},
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+    ]
+    conn.execute(
+        "INSERT INTO context_messages (session_id, context_data, created_at, updated_at, metadata) VALUES (?, ?, ?, ?, ?)",
+        ("s1", json.dumps({"reasoning": reasoning}), 100, 200, "{}"),
+    )
+    conn.execute(
+        "INSERT INTO context_messages (session_id, context_data, created_at, updated_at, metadata) VALUES (?, ?, ?, ?, ?)",
+        ("empty", json.dumps({}), 100, 200, "{}"),
+    )
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def test_legacy_db_is_migrated_and_context_log_seeded(tmp_path):
+    path = legacy_db(tmp_path / "legacy.db")
+
+    initialize_sqlite(path)
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    rows = conn.execute(
+        "SELECT session_id, seq, message, created_at FROM context_log ORDER BY session_id, seq"
+    ).fetchall()
+    assert [(s, seq, json.loads(m)["content"], t) for s, seq, m, t in rows] == [
+        ("s1", 0, "be nice", 200),
+        ("s1", 1, "hi", 200),
+        ("s1", 2, "hello", 200),
+    ]
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+    assert {"context_log", "response_cache", "blobs", "idx_conversations_session_created", "idx_sessions_updated"} <= tables
+
+
+def test_migrations_are_applied_once(tmp_path):
+    path = legacy_db(tmp_path / "legacy.db")
+    initialize_sqlite(path)
+
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO context_log (session_id, seq, message) VALUES ('s1', 3, '{}')")
+    conn.commit()
+    migrate_sqlite(conn)
+    initialize_sqlite(path)
+
+    assert conn.execute("SELECT COUNT(*) FROM context_log").fetchone()[0] == 4
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+
+
+def test_migrated_log_loads_as_the_session_context(tmp_path):
+    path = legacy_db(tmp_path / "legacy.db")
+    session = Session(db=SQLiteDB(db_path=path), session_id="s1")
+
+    assert [m.content for m in session.reasoning_context] == ["be nice", "hi", "hello"]
@@ -0,0 +1,103 @@
+import copy
+
+from core.enums import ToolStatus
+from core.session import MsgStatus, OutputMessage, TextContent, ToolContent, diff_message
+
+
+def apply(message: dict, ops: list) -> dict:
+    """Apply ``chat_patch`` ops the way the client does."""
+    message = copy.deepcopy(message)
+    for op in ops:
+        if op["op"] == "set":
+            message[op["key"]] = op["value"]
+        elif op["op"] == "append":
+            message["content"].append(op["value"])
+        elif op["op"] == "text_delta":
+            message["content"][op["index"]]["text"] += op["text"]
+        elif op["op"] == "update":
+            message["content"][op["index"]].update(op["value"])
+    return message
+
+
+def message(**kwargs) -> dict:
+    return {"msg_id": "m", "status": "progress", "actions": [], "content": [], **kwargs}
+
+
+def test_diff_of_equal_messages_is_empty():
+    old = message(content=[{"type": "text", "text": "hi"}])
+    assert diff_message(old, copy.deepcopy(old)) == []
+
+
+def test_diff_appends_new_items_and_streams_text():
+    old = message(content=[{"type": "text", "text": "Hel"}])
+    new = message(content=[{"type": "text", "text": "Hello"}, {"type": "tool", "tool_name": "x"}])
+
+    ops = diff_message(old, new)
+
+    assert ops == [
+        {"op": "text_delta", "index": 0, "text": "lo"},
+        {"op": "append", "value": {"type": "tool", "tool_name": "x"}},
+    ]
+    assert apply(old, ops) == new
+
+
+def test_diff_sets_fields_and_updates_changed_keys_only():
+    old = message(content=[{"type": "tool", "tool_status": "progress", "tool_response": None}])
+    new = message(status="success", content=[{"type": "tool", "tool_status": "success", "tool_response": {"a": 1}}])
+
+    ops = diff_message(old, new)
+
+    assert {"op": "set", "key": "status", "value": "success"} in ops
+    assert {"op": "update", "index": 0, "value": {"tool_status": "success", "tool_response": {"a": 1}}} in ops
+    assert apply(old, ops) == new
+
+
+def test_rewritten_text_is_an_update_not_a_delta():
+    old = message(content=[{"type": "text", "text": "draft"}])
+    new = message(content=[{"type": "text", "text": "final"}])
+
+    assert diff_message(old, new) == [{"op": "update", "index": 0, "value": {"text": "final"}}]
+
+
+def test_removed_content_needs_a_snapshot():
+    old = message(content=[{"type": "text", "text": "a"}, {"type": "text", "text": "b"}])
+    assert diff_message(old, message(content=[{"type": "text", "text": "a"}])) is None
+
+
+def test_publish_numbers_events_without_gaps(db):
+    events = []
+    out = OutputMessage(db=db, session_id="s", conv_id="c", msg_id="m", emitter=lambda e, d: events.append((e, d)))
+
+    out.publish()
+    out.content.append(TextContent(text="", type="text"))
+    out.publish_delta(0, "Hel")
+    out.publish_delta(0, "lo")
+    out.content.append(ToolContent(tool_name="t", tool_args={}, tool_response=None, tool_status=ToolStatus.PROGRESS))
+    out.publish()
+    # Nothing changed, nothing is sent
+    out.publish()
+    out.update_status(MsgStatus.success)
+
+    assert [e for e, _ in events] == ["chat"] + ["chat_patch"] * 4
+    assert [d["seq"] for _, d in events] == list(range(5))
+
+    # Replaying the events rebuilds the final message
+    client = {k: v for k, v in events[0][1].items() if k != "seq"}
+    for _, patch in events[1:]:
+        client = apply(client, patch["ops"])
+    assert client == out.model_dump()
+
+
+def test_resync_continues_the_sequence(db):
+    events = []
+    out = OutputMessage(db=db, session_id="s", conv_id="c", msg_id="m", emitter=lambda e, d: events.append((e, d)))
+    out.publish()
+    out.content.append(TextContent(text="x", type="text"))
+    out.publish()
+
+    # The client missed seq 1 and asks for the full message again
+    out.resync()
+
+    assert events[-1][0] == "chat"
+    assert events[-1][1]["seq"] == 2
+    assert events[-1][1]["content"] == [{"type": "text", "text": "x"}]
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from core.procpool import ToolProcessPool
+from tools.base import BaseTool, ToolResponse
+
+
+class Sleep(BaseTool):
+    name = "sleep"
+    description = "Sleep, then answer with the worker pid."
+    parameters = {}
+    cpu_bound = True
+
+    def run(self, seconds: float = 0) -> ToolResponse:
+        time.sleep(seconds)
+        return ToolResponse(data=os.getpid())
+
+
+class Crash(Sleep):
+    name = "crash"
+
+    def run(self) -> ToolResponse:
+        os._exit(1)
+
+
+@pytest.fixture
+def pool():
+    pool = ToolProcessPool(max_workers=2, max_tasks_per_child=100, memory_limit_mb=0)
+    yield pool
+    pool.shutdown()
+
+
+def test_call_returns_the_tool_response(pool):
+    response = pool.call(Sleep(None), (), {}, timeout=30)
+    assert response.data != os.getpid()
+
+
+def test_timeout_kills_only_the_stuck_worker(pool):
+    # Start both workers first, spawning them is slow
+    pool.call(Sleep(None), (), {}, timeout=30)
+    results = {}
+
+    def fast_calls():
+        results["fast"] = [pool.call(Sleep(None), (), {"seconds": 0.2}, timeout=30) for _ in range(4)]
+
+    other = threading.Thread(target=fast_calls)
+    other.start()
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.call(Sleep(None), (), {"seconds": 30}, timeout=1)
+    assert time.monotonic() - started < 10
+    other.join(30)
+
+    assert len(results["fast"]) == 4
+    assert pool.metrics()["timeouts"] == 1
+    # The killed worker is replaced
+    assert pool.call(Sleep(None), (), {}, timeout=30).data
+
+
+def test_dead_worker_fails_its_call_only(pool):
+    with pytest.raises(RuntimeError):
+        pool.call(Crash(None), (), {}, timeout=30)
+    assert pool.metrics()["crashes"] == 1
+    assert pool.call(Sleep(None), (), {}, timeout=30).data
+
+
+def test_acall_times_out_without_blocking_the_loop(pool):
+    pool.call(Sleep(None), (), {}, timeout=30)
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.05)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        fast = await pool.acall(Sleep(None), (), {"seconds": 0.1}, timeout=30)
+        with pytest.raises(TimeoutError):
+            await pool.acall(Sleep(None), (), {"seconds": 30}, timeout=1)
+        ticker.cancel()
+        return fast, ticks
+
+    fast, ticks = asyncio.run(run())
+    assert fast.data
+    assert ticks >= 10
@@ -0,0 +1,75 @@
+from tools.base import BaseTool, ToolResponse
+from tools.registry import ToolRegistry
+
+
+class Search(BaseTool):
+    name = "search"
+    description = "Search the web."
+    parameters = {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string"},
+            "limit": {"type": "integer", "minimum": 1},
+            "filters": {"type": "object", "properties": {"site": {"type": "string"}}},
+        },
+        "required": ["query"],
+    }
+
+    def run(self, **kwargs) -> ToolResponse:
+        return ToolResponse(data=kwargs)
+
+
+class Echo(BaseTool):
+    name = "echo"
+    description = "Echo the arguments."
+    parameters = {}
+
+    def run(self, **kwargs) -> ToolResponse:
+        return ToolResponse(data=kwargs)
+
+
+class Broken(Echo):
+    name = "broken"
+    parameters = {"type": "object", "properties": {"x": {"type": "no-such-type"}}}
+
+
+def test_valid_arguments_pass():
+    registry = ToolRegistry([Search(None)])
+    assert registry.validate("search", {"query": "cats", "limit": 3}) is None
+
+
+def test_invalid_arguments_name_the_field():
+    registry = ToolRegistry([Search(None)])
+
+    assert "'query' is a required property" in registry.validate("search", {"limit": 3})
+    assert registry.validate("search", {"query": "cats", "limit": 0}).startswith(
+        "Invalid arguments for search: limit:"
+    )
+    assert "filters.site" in registry.validate("search", {"query": "cats", "filters": {"site": 1}})
+
+
+def test_tools_without_a_usable_schema_are_not_validated():
+    registry = ToolRegistry([Echo(None), Broken(None)])
+
+    assert registry.validate("echo", {"anything": 1}) is None
+    assert registry.validate("broken", {"x": 1}) is None
+    assert registry.validate("unknown", {}) is None
+
+
+def test_llm_format_is_reused_until_a_tool_is_registered():
+    registry = ToolRegistry([Search(None)])
+    payload = registry.llm_format()
+    assert registry.llm_format() is payload
+
+    registry.register(Echo(None))
+    assert registry.llm_format() is not payload
+    assert [t["name"] for t in registry.llm_format()] == ["search", "echo"]
+
+
+def test_register_replaces_a_tool_of_the_same_name():
+    registry = ToolRegistry([Echo(None)])
+    replacement = Echo(None)
+    registry.register(replacement)
+
+    assert len(registry) == 1
+    assert registry.get("echo") is replacement
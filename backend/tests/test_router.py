@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+
+from core.fake_llm import FakeLLM, FakeLLMConfig
+from core.llm import CANCELLED
+from core.router import AsyncLLMRouter, LLMRouter
+
+
+def fake(name: str, **kwargs) -> FakeLLM:
+    return FakeLLM(FakeLLMConfig(chat_model=name, **kwargs))
+
+
+def ask(router: LLMRouter, **kwargs):
+    return router.chat_completions(messages=[{"role": "user", "content": "hi there"}], **kwargs)
+
+
+def test_failover_to_next_backend():
+    broken = fake("broken", error_rate=1.0)
+    ok = fake("ok", reply="fine")
+    router = LLMRouter([broken, ok], hedge_after=0)
+
+    response = ask(router)
+
+    assert response.status
+    assert response.content == "fine"
+    assert router.stats[id(broken)].error_rate() == 1.0
+
+
+def test_hedge_returns_fast_backend():
+    slow = fake("slow", latency=1.0, reply="slow")
+    fast = fake("fast", latency=0.05, reply="fast")
+    router = LLMRouter([slow, fast], hedge_after=0.2)
+
+    started = time.monotonic()
+    response = ask(router)
+
+    assert response.content == "fast"
+    assert time.monotonic() - started < 0.8
+
+
+def test_hedge_losers_demote_slow_backend():
+    slow = fake("slow", latency=1.0)
+    fast = fake("fast", latency=0.05)
+    router = LLMRouter([slow, fast], hedge_after=0.2)
+
+    for _ in range(router.stats[id(slow)].min_samples + 1):
+        ask(router)
+    # Cancelled losers record their lower bound latency from their own thread
+    time.sleep(0.1)
+
+    assert router.stats[id(slow)].latency() is not None
+    assert router._ranked()[0] is fast
+    started = time.monotonic()
+    assert ask(router).status
+    assert time.monotonic() - started < 0.2
+
+
+def test_streamed_hedge_only_forwards_the_winner():
+    slow = fake("slow", latency=1.0, reply="slow words")
+    fast = fake("fast", latency=0.05, reply="fast words")
+    router = LLMRouter([slow, fast], hedge_after=0.2)
+    deltas = []
+
+    response = ask(router, stream=True, on_delta=lambda d: deltas.append(d.content))
+
+    assert response.content == "fast words"
+    assert "".join(deltas) == "fast words"
+
+
+def test_caller_cancel_stops_the_call():
+    slow = fake("slow", latency=5.0)
+    router = LLMRouter([slow], hedge_after=0)
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+
+    started = time.monotonic()
+    response = ask(router, cancel=cancel)
+
+    assert response.finish_reason == CANCELLED
+    assert time.monotonic() - started < 1.0
+    # A call the caller cancelled says nothing about the backend
+    time.sleep(0.1)
+    assert not router.stats[id(slow)]._calls
+
+
+def test_async_router_streams_on_the_loop():
+    slow = fake("slow", latency=1.0, reply="slow")
+    fast = fake("fast", latency=0.05, reply="a b c")
+    router = AsyncLLMRouter([slow, fast], hedge_after=0.2)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        deltas = []
+
+        def on_delta(delta):
+            assert threading.get_ident() == loop_thread
+            deltas.append(delta.content)
+
+        response = await router.chat_completions(
+            messages=[{"role": "user", "content": "hi"}], stream=True, on_delta=on_delta
+        )
+        return response, deltas
+
+    response, deltas = asyncio.run(run())
+
+    assert response.content == "a b c"
+    assert "".join(deltas) == "a b c"
+
+
+def test_async_router_task_cancel_stops_the_attempts():
+    slow = fake("slow", latency=5.0)
+    router = AsyncLLMRouter([slow], hedge_after=0)
+
+    async def run():
+        task = asyncio.create_task(router.chat_completions(messages=[{"role": "user", "content": "hi"}]))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        started = time.monotonic()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return started
+
+    started = asyncio.run(run())
+    # asyncio.run waits for the worker thread, which stops once its attempts are cancelled
+    assert time.monotonic() - started < 1.0
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from database.writer import WriteBehindPersister
+
+
+def message(msg_id: str, status: str, text: str = "") -> dict:
+    return {
+        "session_id": "s",
+        "conv_id": "c",
+        "msg_id": msg_id,
+        "msg_type": "output",
+        "tools": [],
+        "actions": [],
+        "content": [{"type": "text", "text": text}],
+        "status": status,
+    }
+
+
+def stored(db, msg_id: str) -> dict:
+    return db.get_conversation("s", msg_id)
+
+
+@pytest.fixture
+def persister(db):
+    # Flushed by hand, the background thread never ticks during a test
+    persister = WriteBehindPersister(db, interval=3600)
+    yield persister
+    persister._stop.set()
+
+
+def test_progress_states_are_coalesced(db, persister, monkeypatch):
+    batches = []
+    write = db.add_or_update_msgs_to_conv
+    monkeypatch.setattr(db, "add_or_update_msgs_to_conv", lambda b: (batches.append(b), write(b)))
+
+    for i in range(5):
+        persister.save(message("m1", "progress", "x" * i))
+    persister.save(message("m2", "progress", "y"))
+    assert stored(db, "m1") is None
+
+    persister.flush()
+
+    assert len(batches) == 1
+    assert sorted(m["msg_id"] for m in batches[0]) == ["m1", "m2"]
+    assert stored(db, "m1")["status"] == "progress"
+
+
+def test_failed_batch_is_kept_for_the_next_flush(db, persister, monkeypatch):
+    write = db.add_or_update_msgs_to_conv
+    failures = [RuntimeError("disk full")]
+
+    def flaky(batch):
+        if failures:
+            raise failures.pop()
+        write(batch)
+
+    monkeypatch.setattr(db, "add_or_update_msgs_to_conv", flaky)
+    persister.save(message("m1", "progress", "old"))
+    persister.save(message("m2", "progress", "kept"))
+
+    with pytest.raises(RuntimeError):
+        persister.flush()
+    # A newer state arriving before the retry wins over the failed one
+    persister.save(message("m1", "progress", "new"))
+    persister.flush()
+
+    assert stored(db, "m1")["status"] == "progress"
+    assert "new" in str(stored(db, "m1")["content"])
+    assert "kept" in str(stored(db, "m2")["content"])
+
+
+def test_terminal_state_is_written_now_and_never_overwritten(db, persister):
+    persister.save(message("m1", "progress", "partial"))
+    persister.save(message("m1", "success", "final"), sync=True)
+
+    assert stored(db, "m1")["status"] == "success"
+    persister.flush()
+    assert stored(db, "m1")["status"] == "success"
+    assert "final" in str(stored(db, "m1")["content"])
+
+
+def test_terminal_state_waits_for_a_running_flush(db, persister, monkeypatch):
+    write = db.add_or_update_msgs_to_conv
+    flushing = threading.Event()
+    release = threading.Event()
+
+    def slow(batch):
+        if batch[0]["status"] == "progress":
+            flushing.set()
+            release.wait(5)
+        write(batch)
+
+    monkeypatch.setattr(db, "add_or_update_msgs_to_conv", slow)
+    persister.save(message("m1", "progress", "partial"))
+    flush = threading.Thread(target=persister.flush)
+    flush.start()
+    assert flushing.wait(5)
+
+    terminal = threading.Thread(target=persister.save, args=(message("m1", "success", "final"),), kwargs={"sync": True})
+    terminal.start()
+    # Without the write lock the terminal state would land first and be overwritten
+    time.sleep(0.05)
+    release.set()
+    flush.join(5)
+    terminal.join(5)
+
+    assert stored(db, "m1")["status"] == "success"
@@ -1,10 +1,16 @@
+import asyncio
 import logging
+import os
+import threading
 
 from abc import ABC, abstractmethod
-from typing import Any
+from contextvars import ContextVar
+from typing import Any, Optional
 from pydantic import BaseModel
 
-from core.session import Session, OutputMessage
+from core.cache import get_cache, make_cache_key
+from core.procpool import get_tool_pool
+from core.session import Session, OutputMessage, ToolProgress
 from core.enums import ToolStatus
 
 logger = logging.getLogger(__name__)
@@ -16,14 +22,74 @@ class ToolResponse(BaseModel):
     status: ToolStatus = ToolStatus.SUCCESS
     message: str = ""
     data: Any = None
+    # Served from the response cache
+    cached: bool = False
+    # Set when ``data`` is a preview of output moved to the blob store (core.blobs)
+    blob_ref: Optional[str] = None
+
+
+class ProgressSlot:
+    """Latest progress of one running tool call.
+
+    Written by the tool (from any thread or loop) and read by the executor,
+    which publishes it throttled, so a chatty tool costs one update per interval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest: Optional[ToolProgress] = None
+        self._version = 0
+        self._taken = 0
+
+    def report(self, progress: float, total: float = None, message: str = None):
+        with self._lock:
+            self._latest = ToolProgress(progress=progress, total=total, message=message)
+            self._version += 1
+
+    async def handler(self, progress: float, total: Optional[float], message: Optional[str]):
+        """``progress_handler`` for MCP ``call_tool``."""
+        self.report(progress, total, message)
+
+    def take(self) -> Optional[ToolProgress]:
+        """Latest progress if it changed since the last ``take``, else ``None``."""
+        with self._lock:
+            if self._version == self._taken:
+                return None
+            self._taken = self._version
+            return self._latest
+
+
+# Slot of the tool call running in the current context, set by the executor
+progress_slot: ContextVar[Optional[ProgressSlot]] = ContextVar("tool_progress_slot", default=None)
+
+
+def current_progress_slot() -> Optional[ProgressSlot]:
+    return progress_slot.get()
+
+
+def report_progress(progress: float, total: float = None, message: str = None):
+    """Report progress of the tool call running in this context, a no-op outside the executor."""
+    slot = progress_slot.get()
+    if slot is not None:
+        slot.report(progress, total, message)
 
 
 class BaseTool(ABC):
     """Interface for all tools. All tools should inherit from this class."""
 
-    def __init__(self, session: Session, **kwargs):
+    # Per-call timeout in seconds, ``None`` uses the executor default
+    timeout: float = None
+    # Opt-in caching of successful responses for idempotent tools
+    cacheable: bool = False
+    cache_ttl: float = None
+    # Run ``run`` in the shared process pool (core.procpool) instead of the server
+    # process, for CPU-heavy tools. There the tool is built with ``session=None``,
+    # so ``run`` must not use the session and the class must be importable.
+    cpu_bound: bool = False
+
+    def __init__(self, session: Optional[Session], **kwargs):
         self.session: Session = session
-        self.output_message: OutputMessage = self.session.output_message
+        self.output_message: OutputMessage = session.output_message if session is not None else None
 
     def to_llm_format(self):
         """Convert the tool to LLM tool format."""
@@ -51,14 +117,83 @@ class BaseTool(ABC):
         """Tool parameters schema - must be implemented by subclasses."""
         pass
 
+    @property
+    def input_schema(self):
+        """JSON schema the call arguments are validated against, the parameters by default."""
+        return self.parameters
+
+    def _cache_for(self, args, kwargs):
+        """Return ``(cache, key)`` for an opted-in tool, ``(None, None)`` otherwise."""
+        cache = get_cache() if self.cacheable else None
+        if cache is None:
+            return None, None
+        return cache, make_cache_key(f"tool:{self.name}", [args, kwargs])
+
+    def _cache_lookup(self, args, kwargs):
+        """Return ``(cache, key, hit)`` for an opted-in tool, ``(None, None, None)`` otherwise."""
+        cache, cache_key = self._cache_for(args, kwargs)
+        hit = cache.get(cache_key) if cache is not None else None
+        return cache, cache_key, ToolResponse(**hit, cached=True) if hit is not None else None
+
+    async def _acache_lookup(self, args, kwargs):
+        """Async variant of ``_cache_lookup``, a persistent cache is read off the loop."""
+        cache, cache_key = self._cache_for(args, kwargs)
+        hit = await cache.aget(cache_key) if cache is not None else None
+        return cache, cache_key, ToolResponse(**hit, cached=True) if hit is not None else None
+
+    def _cache_store(self, cache, cache_key, response: ToolResponse):
+        if cache_key and response.status == ToolStatus.SUCCESS:
+            cache.set(cache_key, response.model_dump(exclude={"cached"}), ttl=self.cache_ttl)
+
+    async def _acache_store(self, cache, cache_key, response: ToolResponse):
+        if cache_key and response.status == ToolStatus.SUCCESS:
+            await cache.aset(cache_key, response.model_dump(exclude={"cached"}), ttl=self.cache_ttl)
+
+    def _pool_timeout(self) -> float:
+        return self.timeout or float(os.getenv("TOOL_TIMEOUT", "60"))
+
     def safe_call(self, *args, **kwargs):
+        cache, cache_key, hit = self._cache_lookup(args, kwargs)
+        if hit is not None:
+            return hit
+
         try:
-            return self.run(*args, **kwargs)
+            if self.cpu_bound:
+                response = get_tool_pool().call(self, args, kwargs, timeout=self._pool_timeout())
+            else:
+                response = self.run(*args, **kwargs)
 
         except Exception as e:
             logger.exception(f"error in {self.name} tool: {e}")
             return ToolResponse(status=ToolStatus.ERROR, message=str(e))
 
+        self._cache_store(cache, cache_key, response)
+        return response
+
+    async def asafe_call(self, *args, **kwargs):
+        """Async variant of ``safe_call``, used by the async engine."""
+        cache, cache_key, hit = await self._acache_lookup(args, kwargs)
+        if hit is not None:
+            return hit
+
+        try:
+            if self.cpu_bound:
+                response = await get_tool_pool().acall(self, args, kwargs, timeout=self._pool_timeout())
+            else:
+                response = await self.arun(*args, **kwargs)
+
+        except Exception as e:
+            logger.exception(f"error in {self.name} tool: {e}")
+            return ToolResponse(status=ToolStatus.ERROR, message=str(e))
+
+        await self._acache_store(cache, cache_key, response)
+        return response
+
+    async def arun(self, *args, **kwargs) -> ToolResponse:
+        """Async variant of ``run``. Defaults to running ``run`` in a worker thread,
+        tools doing I/O should override it."""
+        return await asyncio.to_thread(self.run, *args, **kwargs)
+
     @abstractmethod
     def run(self, *args, **kwargs) -> ToolResponse:
         """Execute the tool - must be implemented by subclasses."""
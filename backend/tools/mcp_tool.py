@@ -0,0 +1,66 @@
+import logging
+import os
+
+from core.enums import ToolStatus
+from core.mcp_manager import MCPManager, MCPToolSpec
+from core.session import Session
+from tools.base import BaseTool, ToolResponse, current_progress_slot
+
+logger = logging.getLogger(__name__)
+
+
+class MCPTool(BaseTool):
+    """Tool served by an MCP server through the shared ``MCPManager``."""
+
+    def __init__(self, session: Session, manager: MCPManager, spec: MCPToolSpec):
+        super().__init__(session)
+        self.manager = manager
+        self.spec = spec
+
+    @property
+    def name(self):
+        return self.spec.name
+
+    @property
+    def description(self):
+        return self.spec.description
+
+    @property
+    def parameters(self):
+        return self.spec.parameters
+
+    @property
+    def cacheable(self):
+        """MCP tools opt in to response caching through ``TOOL_CACHE_ALLOWLIST``."""
+        allowlist = os.getenv("TOOL_CACHE_ALLOWLIST", "")
+        return self.name in {name.strip() for name in allowlist.split(",") if name.strip()}
+
+    @property
+    def input_schema(self):
+        return self.spec.input_schema or self.parameters
+
+    def to_llm_format(self):
+        return self.spec.llm_format
+
+    def _progress_handler(self):
+        # Captured here, the handler runs on the MCP loop outside the call's context
+        slot = current_progress_slot()
+        return slot.handler if slot is not None else None
+
+    def run(self, **kwargs) -> ToolResponse:
+        try:
+            result = self.manager.call_tool(self.name, kwargs, progress_handler=self._progress_handler())
+            return ToolResponse(status=ToolStatus.SUCCESS, message="", data=result.data)
+        except Exception as e:
+            logger.error(f"Tool call failed for {self.name}: {e}")
+            return ToolResponse(status=ToolStatus.ERROR, message=str(e), data={"error": str(e)})
+
+    async def arun(self, **kwargs) -> ToolResponse:
+        try:
+            result = await self.manager.acall_tool(
+                self.name, kwargs, progress_handler=self._progress_handler()
+            )
+            return ToolResponse(status=ToolStatus.SUCCESS, message="", data=result.data)
+        except Exception as e:
+            logger.error(f"Tool call failed for {self.name}: {e}")
+            return ToolResponse(status=ToolStatus.ERROR, message=str(e), data={"error": str(e)})
@@ -0,0 +1,43 @@
+import logging
+
+from core import blobs
+from core.enums import ToolStatus
+from tools.base import BaseTool, ToolResponse
+
+logger = logging.getLogger(__name__)
+
+
+class ReadToolOutputTool(BaseTool):
+    """Reads a slice of a tool output that was truncated and moved to the blob store."""
+
+    @property
+    def name(self):
+        return "read_tool_output"
+
+    @property
+    def description(self):
+        return (
+            "Read more of a truncated tool output. Use the blob_ref of the tool "
+            "result and page through it with offset and length (in characters)."
+        )
+
+    @property
+    def parameters(self):
+        return {
+            "type": "object",
+            "properties": {
+                "blob_ref": {"type": "string", "description": "blob_ref of the truncated tool result"},
+                "offset": {"type": "integer", "description": "Character offset to start reading at", "default": 0},
+                "length": {"type": "integer", "description": "Number of characters to read", "default": 4000},
+            },
+            "required": ["blob_ref"],
+        }
+
+    def run(self, blob_ref: str, offset: int = 0, length: int = 4000) -> ToolResponse:
+        # Keep the slice inline, it must not be offloaded again
+        length = max(1, min(length, blobs.inline_limit() or length))
+        text = blobs.read_text(self.session.db, blob_ref, offset=max(0, offset), length=length)
+        if text is None:
+            error = f"No tool output stored under {blob_ref}"
+            return ToolResponse(status=ToolStatus.ERROR, message=error, data={"error": error})
+        return ToolResponse(status=ToolStatus.SUCCESS, message="", data=text)
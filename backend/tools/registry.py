@@ -0,0 +1,100 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import jsonschema
+
+from tools.base import BaseTool
+
+logger = logging.getLogger(__name__)
+
+# Compiled validators by identity of their schema. MCP schemas come from the
+# process-wide tool catalog, so each is compiled once, not once per engine.
+_compiled: OrderedDict = OrderedDict()
+_compiled_lock = threading.Lock()
+_MAX_COMPILED = 1024
+
+
+def _compile_validator(tool: BaseTool) -> Optional[Any]:
+    """Validator for the tool's ``input_schema``, ``None`` without a usable schema."""
+    schema = tool.input_schema
+    if not isinstance(schema, dict) or not schema:
+        return None
+
+    with _compiled_lock:
+        entry = _compiled.get(id(schema))
+        if entry is not None and entry[0] is schema:
+            _compiled.move_to_end(id(schema))
+            return entry[1]
+
+    try:
+        validator_cls = jsonschema.validators.validator_for(schema)
+        validator_cls.check_schema(schema)
+        validator = validator_cls(schema)
+    except jsonschema.SchemaError as e:
+        logger.warning(f"Not validating arguments of {tool.name}, invalid schema: {e.message}")
+        validator = None
+
+    with _compiled_lock:
+        # The entry keeps ``schema`` alive, so its id is not reused while cached
+        _compiled[id(schema)] = (schema, validator)
+        while len(_compiled) > _MAX_COMPILED:
+            _compiled.popitem(last=False)
+    return validator
+
+
+class ToolRegistry:
+    """Tools of one engine by name.
+
+    The LLM tool payload is built once and reused every step until a tool is
+    registered, and every tool's JSON-schema validator is compiled on
+    registration, so malformed arguments are rejected without running the tool.
+    """
+
+    def __init__(self, tools: Iterable[BaseTool] = ()):
+        self._tools: Dict[str, BaseTool] = {}
+        self._validators: Dict[str, Any] = {}
+        self._llm_format: Optional[Tuple[dict, ...]] = None
+        self.extend(tools)
+
+    def register(self, tool: BaseTool):
+        """Add ``tool``, replacing a registered tool of the same name."""
+        if tool.name in self._tools:
+            logger.warning(f"Tool {tool.name} registered twice, keeping the latest")
+        self._tools[tool.name] = tool
+        self._validators[tool.name] = _compile_validator(tool)
+        self._llm_format = None
+
+    def extend(self, tools: Iterable[BaseTool]):
+        for tool in tools:
+            self.register(tool)
+
+    def get(self, name: str) -> Optional[BaseTool]:
+        return self._tools.get(name)
+
+    def llm_format(self) -> Tuple[dict, ...]:
+        """Tools in LLM format, the same tuple every call until the tools change."""
+        if self._llm_format is None:
+            self._llm_format = tuple(tool.to_llm_format() for tool in self._tools.values())
+        return self._llm_format
+
+    def validate(self, name: str, arguments: Any) -> Optional[str]:
+        """Error message for arguments that do not match the tool's schema, ``None`` if valid."""
+        validator = self._validators.get(name)
+        if validator is None:
+            return None
+        error = jsonschema.exceptions.best_match(validator.iter_errors(arguments))
+        if error is None:
+            return None
+        path = ".".join(str(p) for p in error.absolute_path)
+        return f"Invalid arguments for {name}: {f'{path}: ' if path else ''}{error.message}"
+
+    def __iter__(self) -> Iterator[BaseTool]:
+        return iter(self._tools.values())
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
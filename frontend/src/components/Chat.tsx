@@ -9,8 +9,15 @@ import { Wifi, WifiOff, AlertCircle, Trash2 } from "lucide-react";
 import { Button } from "@/components/ui/button";
 
 export function Chat() {
-  const { isConnected, messages, error, sendMessage, clearMessages } =
-    useSocket();
+  const {
+    isConnected,
+    messages,
+    error,
+    sendMessage,
+    stopGeneration,
+    fetchBlob,
+    clearMessages,
+  } = useSocket();
 
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const [sessionId] = useState(() => `session_${crypto.randomUUID()}`);
@@ -37,6 +44,14 @@ export function Chat() {
     sendMessage(message);
   };
 
+  const isGenerating = messages.some(
+    (message) => message.msg_type === "output" && message.status === "progress"
+  );
+
+  const handleStop = () => {
+    stopGeneration(sessionId);
+  };
+
   const connectionStatus = () => {
     if (error) {
       return (
@@ -108,7 +123,11 @@ export function Chat() {
         ) : (
           <div className="space-y-1">
             {messages.map((message) => (
-              <ChatMessage key={message.msg_id} message={message} />
+              <ChatMessage
+                key={message.msg_id}
+                message={message}
+                onFetchBlob={fetchBlob}
+              />
             ))}
             <div ref={messagesEndRef} />
           </div>
@@ -118,6 +137,8 @@ export function Chat() {
       {/* Input */}
       <ChatInput
         onSendMessage={handleSendMessage}
+        onStop={handleStop}
+        isGenerating={isGenerating}
         disabled={!isConnected}
         placeholder={isConnected ? "Type your message..." : "Connecting..."}
       />
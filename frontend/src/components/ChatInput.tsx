@@ -3,16 +3,20 @@
 import React, { useState, useRef, useEffect } from "react";
 import { Textarea } from "@/components/ui/textarea";
 import { Button } from "@/components/ui/button";
-import { Send, Settings } from "lucide-react";
+import { Send, Settings, Square } from "lucide-react";
 
 interface ChatInputProps {
   onSendMessage: (message: string, systemPrompt?: string) => void;
+  onStop?: () => void;
+  isGenerating?: boolean;
   disabled?: boolean;
   placeholder?: string;
 }
 
 export function ChatInput({
   onSendMessage,
+  onStop,
+  isGenerating = false,
   disabled = false,
   placeholder = "Type your message...",
 }: ChatInputProps) {
@@ -89,14 +93,27 @@ export function ChatInput({
             rows={1}
           />
         </div>
-        <Button
-          type="submit"
-          disabled={!message.trim() || disabled}
-          size="icon"
-          className="h-[60px] w-[60px]"
-        >
-          <Send className="h-4 w-4" />
-        </Button>
+        {isGenerating && onStop ? (
+          <Button
+            type="button"
+            variant="outline"
+            onClick={onStop}
+            size="icon"
+            className="h-[60px] w-[60px]"
+            title="Stop generating"
+          >
+            <Square className="h-4 w-4" />
+          </Button>
+        ) : (
+          <Button
+            type="submit"
+            disabled={!message.trim() || disabled}
+            size="icon"
+            className="h-[60px] w-[60px]"
+          >
+            <Send className="h-4 w-4" />
+          </Button>
+        )}
       </form>
 
       {/* Helper Text */}
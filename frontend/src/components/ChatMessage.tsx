@@ -9,9 +9,10 @@ import { User, Bot, Loader2, CheckCircle, XCircle } from "lucide-react";
 
 interface ChatMessageProps {
   message: ChatMessageType;
+  onFetchBlob?: (blobRef: string) => Promise<unknown>;
 }
 
-export function ChatMessage({ message }: ChatMessageProps) {
+export function ChatMessage({ message, onFetchBlob }: ChatMessageProps) {
   const isUser = message.msg_type === "input";
   const isOutput = message.msg_type === "output";
 
@@ -72,7 +73,11 @@ export function ChatMessage({ message }: ChatMessageProps) {
           )}
         >
           {message.content.map((content, index) => (
-            <MessageContent key={index} content={content} />
+            <MessageContent
+              key={index}
+              content={content}
+              onFetchBlob={onFetchBlob}
+            />
           ))}
         </div>
 
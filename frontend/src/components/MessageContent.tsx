@@ -13,11 +13,17 @@ import remarkGfm from "remark-gfm";
 
 interface MessageContentProps {
   content: MessageContentType;
+  onFetchBlob?: (blobRef: string) => Promise<unknown>;
 }
 
-export function MessageContent({ content }: MessageContentProps) {
+export function MessageContent({ content, onFetchBlob }: MessageContentProps) {
   if ("tool_name" in content) {
-    return <ToolContent content={content as ToolContentType} />;
+    return (
+      <ToolContent
+        content={content as ToolContentType}
+        onFetchBlob={onFetchBlob}
+      />
+    );
   }
 
   // Handle TextContent
@@ -16,10 +16,26 @@ import { useState } from "react";
 
 interface ToolContentProps {
   content: ToolContentType;
+  onFetchBlob?: (blobRef: string) => Promise<unknown>;
 }
 
-export function ToolContent({ content }: ToolContentProps) {
+export function ToolContent({ content, onFetchBlob }: ToolContentProps) {
   const [isExpanded, setIsExpanded] = useState(false);
+  // Full output once loaded, the message only carries a preview of it
+  const [fullResponse, setFullResponse] = useState<unknown>(undefined);
+  const [isLoadingFull, setIsLoadingFull] = useState(false);
+
+  const loadFullResponse = async () => {
+    if (!content.blob_ref || !onFetchBlob) return;
+    setIsLoadingFull(true);
+    try {
+      setFullResponse(await onFetchBlob(content.blob_ref));
+    } catch (err) {
+      console.error("Failed to load tool output:", err);
+    } finally {
+      setIsLoadingFull(false);
+    }
+  };
 
   const getStatusIcon = () => {
     switch (content.tool_status) {
@@ -47,6 +63,13 @@ export function ToolContent({ content }: ToolContentProps) {
     }
   };
 
+  const progress =
+    content.tool_status === "progress" ? content.tool_progress : null;
+  const progressPercent =
+    progress && progress.total
+      ? Math.min(100, Math.round((progress.progress / progress.total) * 100))
+      : null;
+
   const formatToolArgs = (args: Record<string, unknown>) => {
     return Object.entries(args).map(([key, value]) => (
       <div key={key} className="text-sm">
@@ -91,6 +114,13 @@ export function ToolContent({ content }: ToolContentProps) {
         >
           {content.tool_status}
         </Badge>
+        {content.cached && <Badge variant="secondary">cached</Badge>}
+        {progress && (
+          <span className="text-xs text-muted-foreground truncate">
+            {progressPercent !== null ? `${progressPercent}%` : progress.progress}
+            {progress.message ? ` · ${progress.message}` : ""}
+          </span>
+        )}
         <div className="ml-auto">
           {isExpanded ? (
             <ChevronDown className="h-4 w-4" />
@@ -100,6 +130,15 @@ export function ToolContent({ content }: ToolContentProps) {
         </div>
       </div>
 
+      {progressPercent !== null && (
+        <div className="mt-2 h-1 w-full rounded bg-blue-100 dark:bg-blue-900">
+          <div
+            className="h-1 rounded bg-blue-500 transition-all duration-300"
+            style={{ width: `${progressPercent}%` }}
+          />
+        </div>
+      )}
+
       {isExpanded && (
         <div className="mt-3 space-y-3 border-t pt-3">
           {Object.keys(content.tool_args).length > 0 && (
@@ -120,9 +159,22 @@ export function ToolContent({ content }: ToolContentProps) {
               </h4>
               <div className="bg-muted/50 rounded p-2 text-sm font-mono overflow-x-auto">
                 <pre className="whitespace-pre-wrap">
-                  {formatToolResponse(content.tool_response)}
+                  {formatToolResponse(
+                    fullResponse !== undefined
+                      ? fullResponse
+                      : content.tool_response
+                  )}
                 </pre>
               </div>
+              {content.blob_ref && fullResponse === undefined && onFetchBlob && (
+                <button
+                  className="mt-2 text-xs text-blue-600 hover:underline disabled:opacity-50"
+                  onClick={loadFullResponse}
+                  disabled={isLoadingFull}
+                >
+                  {isLoadingFull ? "Loading..." : "Load full output"}
+                </button>
+              )}
             </div>
           ) : (
             <></>
@@ -2,7 +2,33 @@
 
 import { useEffect, useRef, useState } from "react";
 import { io, Socket } from "socket.io-client";
-import { ChatInput, ChatMessage } from "@/types/chat";
+import { ChatInput, ChatMessage, ChatPatch, PatchOp } from "@/types/chat";
+
+// Version of the chat_patch protocol this client understands
+const PATCH_PROTOCOL_VERSION = 1;
+
+function applyPatch(message: ChatMessage, ops: PatchOp[]): ChatMessage {
+  const updated: ChatMessage = { ...message, content: [...message.content] };
+  for (const op of ops) {
+    if (op.op === "set") {
+      (updated as unknown as Record<string, unknown>)[op.key] = op.value;
+    } else if (op.op === "append") {
+      updated.content.push(op.value);
+    } else if (op.op === "update") {
+      updated.content[op.index] = {
+        ...updated.content[op.index],
+        ...op.value,
+      } as ChatMessage["content"][number];
+    } else if (op.op === "text_delta") {
+      const item = updated.content[op.index];
+      updated.content[op.index] = {
+        type: "text",
+        text: (item && "text" in item ? item.text : "") + op.text,
+      };
+    }
+  }
+  return updated;
+}
 
 export function useSocket(url: string = "http://localhost:8000/chat") {
   const [socket, setSocket] = useState<Socket | null>(null);
@@ -33,9 +59,15 @@ export function useSocket(url: string = "http://localhost:8000/chat") {
       setError("Failed to connect to server");
     });
 
-    // Listen for chat messages
+    // Last applied seq per message, and messages waiting for a resync
+    const seqs = new Map<string, number | null>();
+    const resyncing = new Set<string>();
+
+    // Full message snapshots
     newSocket.on("chat", (message: ChatMessage) => {
       console.log("Received message:", message);
+      seqs.set(message.msg_id, message.seq ?? null);
+      resyncing.delete(message.msg_id);
       setMessages((prev) => {
         const existingIndex = prev.findIndex(
           (msg) => msg.msg_id === message.msg_id
@@ -52,6 +84,36 @@ export function useSocket(url: string = "http://localhost:8000/chat") {
       });
     });
 
+    // Incremental updates, a missed patch asks the server for a snapshot
+    newSocket.on("chat_patch", (patch: ChatPatch) => {
+      if (resyncing.has(patch.msg_id)) {
+        return;
+      }
+      const last = seqs.get(patch.msg_id);
+      if (last !== null && last !== undefined && patch.seq <= last) {
+        return;
+      }
+      if (
+        patch.v !== PATCH_PROTOCOL_VERSION ||
+        last === undefined ||
+        (last !== null && patch.seq !== last + 1)
+      ) {
+        resyncing.add(patch.msg_id);
+        newSocket.emit("resync", {
+          session_id: patch.session_id,
+          msg_id: patch.msg_id,
+        });
+        return;
+      }
+
+      seqs.set(patch.msg_id, patch.seq);
+      setMessages((prev) =>
+        prev.map((msg) =>
+          msg.msg_id === patch.msg_id ? applyPatch(msg, patch.ops) : msg
+        )
+      );
+    });
+
     socketRef.current = newSocket;
     setSocket(newSocket);
 
@@ -68,6 +130,22 @@ export function useSocket(url: string = "http://localhost:8000/chat") {
     }
   };
 
+  // Ask the server to stop generating for a session (optionally one message)
+  const stopGeneration = (sessionId: string, msgId?: string) => {
+    if (socket && isConnected) {
+      socket.emit("stop", { session_id: sessionId, msg_id: msgId });
+    }
+  };
+
+  // Full tool output behind a truncated preview
+  const fetchBlob = async (blobRef: string): Promise<unknown> => {
+    if (!socket || !isConnected) {
+      throw new Error("Not connected");
+    }
+    const ack = await socket.emitWithAck("fetch_blob", { blob_ref: blobRef });
+    return ack?.data;
+  };
+
   const clearMessages = () => {
     setMessages([]);
   };
@@ -78,6 +156,8 @@ export function useSocket(url: string = "http://localhost:8000/chat") {
     messages,
     error,
     sendMessage,
+    stopGeneration,
+    fetchBlob,
     clearMessages,
   };
 }
@@ -7,6 +7,24 @@ export interface ChatMessage {
   content: MessageContent[];
   status: "progress" | "success" | "error";
   msg_id: string;
+  // Sequence number of the snapshot, patches continue from it (null: no more patches)
+  seq?: number | null;
+}
+
+// Incremental update of a message sent on "chat_patch", see applyPatch
+export type PatchOp =
+  | { op: "set"; key: string; value: unknown }
+  | { op: "append"; value: MessageContent }
+  | { op: "update"; index: number; value: Partial<MessageContent> }
+  | { op: "text_delta"; index: number; text: string };
+
+export interface ChatPatch {
+  v: number;
+  session_id: string;
+  conv_id: string;
+  msg_id: string;
+  seq: number;
+  ops: PatchOp[];
 }
 
 export type MessageContent =
@@ -36,11 +54,22 @@ export interface FileContent {
   };
 }
 
+export interface ToolProgress {
+  progress: number;
+  total?: number | null;
+  message?: string | null;
+}
+
 export interface ToolContent {
   tool_name: string;
   tool_args: Record<string, unknown>;
   tool_response: unknown;
   tool_status: "progress" | "success" | "error";
+  cached?: boolean;
+  // Set when tool_response is a preview of an output kept in the blob store
+  blob_ref?: string | null;
+  // Latest progress of a running call
+  tool_progress?: ToolProgress | null;
 }
 
 export interface ChatInput {